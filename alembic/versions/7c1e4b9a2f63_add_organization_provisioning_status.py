@@ -0,0 +1,35 @@
+"""Add organization provisioning status
+
+Revision ID: 7c1e4b9a2f63
+Revises: 528d01a9d251
+Create Date: 2026-10-18 09:12:31.504217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b9a2f63'
+down_revision: Union[str, None] = '528d01a9d251'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Organizations that already exist were provisioned synchronously
+    op.add_column('organizations',
+        sa.Column('provisioning_status', sa.String(), server_default='ready', nullable=False)
+    )
+    op.add_column('organizations', sa.Column('provisioning_step', sa.String(), nullable=True))
+    op.add_column('organizations', sa.Column('provisioning_error', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('organizations', 'provisioning_error')
+    op.drop_column('organizations', 'provisioning_step')
+    op.drop_column('organizations', 'provisioning_status')
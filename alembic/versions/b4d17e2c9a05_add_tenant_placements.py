@@ -0,0 +1,43 @@
+"""Add tenant placements
+
+Revision ID: b4d17e2c9a05
+Revises: 7c1e4b9a2f63
+Create Date: 2026-10-18 15:40:12.918304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d17e2c9a05'
+down_revision: Union[str, None] = '7c1e4b9a2f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tenant_placements',
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('server', sa.String(), nullable=False),
+        sa.Column('moving_to', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('organization_id')
+    )
+    op.create_index(op.f('ix_tenant_placements_server'), 'tenant_placements', ['server'], unique=False)
+    # Every existing tenant database lives next to the core database
+    op.execute(
+        "INSERT INTO tenant_placements (organization_id, server) "
+        "SELECT id, 'default' FROM organizations"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tenant_placements_server'), table_name='tenant_placements')
+    op.drop_table('tenant_placements')
@@ -0,0 +1,79 @@
+import asyncio
+from logging.config import fileConfig
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+from alembic import context
+from app.models.tenant import TenantBase
+from app.database.core import db_manager, tenant_schema_name
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging, unless the tenant migration
+# runner already configured it
+if config.config_file_name is not None and "tenant_slug" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+# The tenant comes from the migration runner, or from `-x tenant=<slug>`
+tenant_slug = config.attributes.get("tenant_slug") or context.get_x_argument(as_dictionary=True).get("tenant")
+if not tenant_slug:
+    raise SystemExit("Pass the tenant to migrate with -x tenant=<slug>")
+
+# The server holding the tenant: from the runner, `-x server=<name>`, or its placement
+tenant_server = config.attributes.get("tenant_server") or context.get_x_argument(as_dictionary=True).get("server")
+if tenant_server is None and db_manager.placements.enabled and not db_manager.uses_schemas:
+    tenant_server = asyncio.run(db_manager.placements.locate(tenant_slug))
+
+# In schema mode every tenant keeps its tables and version table in its own schema
+schema = tenant_schema_name(tenant_slug) if db_manager.uses_schemas else None
+
+target_metadata = TenantBase.metadata
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode."""
+    context.configure(
+        url=db_manager.tenant_database_url(tenant_slug, tenant_server),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        version_table_schema=schema,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection: Connection) -> None:
+    if schema:
+        quoted = connection.dialect.identifier_preparer.quote_identifier(schema)
+        connection.exec_driver_sql(f"SET search_path TO {quoted}")
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        version_table_schema=schema,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_async_migrations() -> None:
+    """Run migrations in 'online' mode with async engine."""
+    connectable = create_async_engine(
+        db_manager.tenant_database_url(tenant_slug, tenant_server),
+        poolclass=pool.NullPool,
+    )
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode."""
+    asyncio.run(run_async_migrations())
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,48 @@
+"""Initialize tenant tables
+
+Revision ID: 3f2a9c1d8e47
+Revises: 
+Create Date: 2026-10-18 11:40:02.918364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d8e47'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tenants provisioned before migrations existed already have this table
+    if sa.inspect(op.get_bind()).has_table('tenant_users'):
+        return
+
+    # Create tenant_users table
+    op.create_table('tenant_users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tenant_users_id'), 'tenant_users', ['id'], unique=False)
+    op.create_index(op.f('ix_tenant_users_email'), 'tenant_users', ['email'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tenant_users_email'), table_name='tenant_users')
+    op.drop_index(op.f('ix_tenant_users_id'), table_name='tenant_users')
+    op.drop_table('tenant_users')
@@ -1,28 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.auth import UserRegister, UserLogin, UserResponse, TenantUserResponse, Token
+from app.schemas.auth import (
+    UserRegister, UserLogin, UserResponse, Token, TokenRefresh, token_json, user_json
+)
 from app.services.user_service import UserService
-from app.core.deps import get_core_db, get_tenant_db, get_tenant_slug
-from app.core.security import create_access_token
+from app.core.deps import (
+    get_core_db, get_core_read_db, get_optional_tenant_db, get_optional_tenant_read_db, get_tenant_slug
+)
+from app.core.security import create_access_token, create_refresh_token, verify_refresh_token
+from app.core.serialization import ORJSONResponse
+from app.models.core import CoreUser
+from app.models.tenant import TenantUser
 
 router = APIRouter()
 security = HTTPBearer()
 
+def _token_response(claims: dict) -> ORJSONResponse:
+    return ORJSONResponse(token_json.build(
+        access_token=create_access_token(data=claims),
+        token_type="bearer",
+        refresh_token=create_refresh_token(data=claims)
+    ))
+
 @router.post("/register", response_model=UserResponse)
 async def register(
-    request: Request,
     user_data: UserRegister,
-    tenant_slug: str = Depends(get_tenant_slug),
-    core_db: AsyncSession = Depends(get_core_db)
+    core_db: AsyncSession = Depends(get_core_db),
+    tenant_db: Optional[AsyncSession] = Depends(get_optional_tenant_db)
 ):
     """Register user - routes to core or tenant based on X-TENANT header"""
     
-    if not tenant_slug:
+    # Sessions are lazy: only the database actually used holds a connection
+    if tenant_db is None:
         # Core registration
         try:
             user = await UserService.create_core_user(core_db, user_data)
-            return UserResponse.model_validate(user)
+            return ORJSONResponse(user, user_json)
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,24 +45,21 @@ async def register(
             )
     else:
         # Tenant registration
-        tenant_db = await get_tenant_db(request).__anext__()
         try:
             user = await UserService.create_tenant_user(tenant_db, user_data)
-            return TenantUserResponse.model_validate(user)
+            return ORJSONResponse(user, user_json)
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=str(e)
             )
-        finally:
-            await tenant_db.close()
 
 @router.post("/login", response_model=Token)
 async def login(
-    request: Request,
     login_data: UserLogin,
-    tenant_slug: str = Depends(get_tenant_slug),
-    core_db: AsyncSession = Depends(get_core_db)
+    tenant_slug: Optional[str] = Depends(get_tenant_slug),
+    core_db: AsyncSession = Depends(get_core_read_db),
+    tenant_db: Optional[AsyncSession] = Depends(get_optional_tenant_read_db)
 ):
     """Login user - routes to core or tenant based on X-TENANT header"""
     
@@ -63,29 +75,55 @@ async def login(
                 detail="Incorrect email or password"
             )
         
-        access_token = create_access_token(
-            data={"user_id": user.id, "context": "core"}
-        )
+        claims = {"user_id": user.id, "context": "core"}
         
-        return Token(access_token=access_token, token_type="bearer")
+        return _token_response(claims)
     else:
         # Tenant login
-        tenant_db = await get_tenant_db(request).__anext__()
-        try:
-            user = await UserService.authenticate_tenant_user(
-                tenant_db, login_data.email, login_data.password
-            )
-            
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Incorrect email or password"
-                )
-            
-            access_token = create_access_token(
-                data={"user_id": user.id, "context": "tenant", "tenant": tenant_slug}
+        user = await UserService.authenticate_tenant_user(
+            tenant_db, login_data.email, login_data.password
+        )
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password"
             )
-            
-            return Token(access_token=access_token, token_type="bearer")
-        finally:
-            await tenant_db.close()
\ No newline at end of file
+        
+        claims = {"user_id": user.id, "context": "tenant", "tenant": tenant_slug}
+        
+        return _token_response(claims)
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    refresh_data: TokenRefresh,
+    tenant_slug: Optional[str] = Depends(get_tenant_slug),
+    core_db: AsyncSession = Depends(get_core_read_db),
+    tenant_db: Optional[AsyncSession] = Depends(get_optional_tenant_read_db)
+):
+    """Exchange a refresh token for new tokens without re-checking the password"""
+    
+    token_data = verify_refresh_token(refresh_data.refresh_token)
+    if token_data is None or token_data.tenant != tenant_slug:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
+    # A single primary-key lookup confirms the user still exists and is active
+    if token_data.context == "core":
+        user = await core_db.get(CoreUser, token_data.user_id)
+    else:
+        user = await tenant_db.get(TenantUser, token_data.user_id)
+    
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    
+    claims = {"user_id": token_data.user_id, "context": token_data.context}
+    if token_data.tenant:
+        claims["tenant"] = token_data.tenant
+    
+    return _token_response(claims)
\ No newline at end of file
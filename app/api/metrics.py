@@ -0,0 +1,61 @@
+import secrets
+from typing import Callable, Dict, List
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+from app.config import settings
+from app.core.cache import user_cache
+from app.core.security import password_hash_stats, token_cache_stats
+from app.database.core import db_manager
+from app.database.metrics import db_metrics
+from app.services.provisioning import provisioning_pipeline
+from app.services.tenant_directory import tenant_directory
+
+router = APIRouter()
+
+# Stats of the in-process caches and pools; gauges unless listed in COUNTER_STATS
+STATS: Dict[str, Callable[[], Dict[str, float]]] = {
+    "engine_cache": db_manager.engine_cache_stats,
+    "compiled_cache": db_manager.compiled_cache_stats,
+    "connection_budget": db_manager.connection_budget_stats,
+    "tenant_placement": db_manager.placements.stats,
+    "token_cache": token_cache_stats,
+    "user_cache": user_cache.stats,
+    "password_hash": password_hash_stats,
+    "tenant_directory": tenant_directory.stats,
+    "provisioning": provisioning_pipeline.stats,
+}
+
+# Stat keys that only ever grow, exported as counters
+COUNTER_STATS = {"hits", "misses", "evictions", "negative_hits", "waits", "wait_seconds_total", "completed", "failed"}
+
+def render_stats() -> str:
+    lines: List[str] = []
+    for group, collect in STATS.items():
+        for key, value in collect().items():
+            if value is None:
+                continue
+            name = f"multitenant_{group}_{key}"
+            kind = "gauge"
+            if key in COUNTER_STATS:
+                kind = "counter"
+                if not name.endswith("_total"):
+                    name += "_total"
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request):
+    """Database and cache metrics in the Prometheus text format"""
+    if settings.metrics_token is not None and not secrets.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {settings.metrics_token}"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Metrics token required"
+        )
+    
+    return PlainTextResponse(
+        db_metrics.render() + render_stats(),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.organization import OrganizationCreate, OrganizationResponse
+from app.schemas.organization import (
+    OrganizationCreate, OrganizationResponse, ProvisioningStatusResponse,
+    organization_json, provisioning_status_json
+)
+from app.core.serialization import ORJSONResponse
 from app.services.organization_service import OrganizationService
-from app.core.deps import get_core_db, get_current_core_user
+from app.core.deps import get_core_db, get_core_read_db, get_current_core_user, get_current_core_user_readonly
 from app.models.core import CoreUser
 
 router = APIRouter()
@@ -18,9 +22,61 @@ async def create_organization(
         organization = await OrganizationService.create_organization(
             db, org_data, current_user
         )
-        return OrganizationResponse.model_validate(organization)
+        return ORJSONResponse(organization, organization_json)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
-        )
\ No newline at end of file
+        )
+
+@router.get("/{slug}/status", response_model=ProvisioningStatusResponse)
+async def get_provisioning_status(
+    slug: str,
+    current_user: CoreUser = Depends(get_current_core_user_readonly),
+    db: AsyncSession = Depends(get_core_read_db)
+):
+    """Report tenant provisioning progress for an organization you own"""
+    organization = await OrganizationService.get_organization(db, slug)
+    
+    if organization is None or organization.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Organization not found"
+        )
+    
+    return ORJSONResponse(provisioning_status_json.build(
+        slug=organization.slug,
+        status=organization.provisioning_status,
+        step=organization.provisioning_step,
+        error=organization.provisioning_error
+    ))
+
+@router.post("/{slug}/retry", response_model=ProvisioningStatusResponse)
+async def retry_provisioning(
+    slug: str,
+    current_user: CoreUser = Depends(get_current_core_user),
+    db: AsyncSession = Depends(get_core_db)
+):
+    """Provision an organization you own again after its provisioning failed"""
+    organization = await OrganizationService.get_organization(db, slug)
+    
+    if organization is None or organization.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Organization not found"
+        )
+    
+    try:
+        organization = await OrganizationService.retry_provisioning(db, slug, current_user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    return ORJSONResponse(provisioning_status_json.build(
+        slug=organization.slug,
+        status=organization.provisioning_status,
+        step=organization.provisioning_step,
+        error=organization.provisioning_error
+    ))
\ No newline at end of file
@@ -1,17 +1,70 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.auth import TenantUserResponse, TenantUserUpdate
-from app.core.deps import get_tenant_db, get_current_tenant_user
+from app.schemas.auth import (
+    TenantUserResponse, TenantUserUpdate, TenantUserPage, BulkImportResult,
+    tenant_user_json, tenant_user_page_json, bulk_import_result_json
+)
+from app.core.cache import user_cache, user_cache_key
+from app.core.serialization import ORJSONResponse
+from app.core.deps import (
+    get_tenant_db, get_tenant_read_db, get_current_tenant_user, get_current_tenant_user_readonly,
+    get_tenant_owner, get_tenant_owner_readonly
+)
 from app.models.tenant import TenantUser
+from app.services.user_service import UserService
+from typing import AsyncIterator, Optional
+from datetime import datetime
+import codecs
 
 router = APIRouter()
 
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    """Split the streamed request body into lines without buffering it"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+@router.get("", response_model=TenantUserPage)
+async def list_users(
+    after_id: Optional[int] = Query(None, description="Cursor: the next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    is_active: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    current_user: TenantUser = Depends(get_tenant_owner_readonly),
+    db: AsyncSession = Depends(get_tenant_read_db)
+):
+    """List tenant users a page at a time using keyset pagination on id (organization owner only)"""
+    users, next_cursor = await UserService.list_tenant_users(
+        db,
+        after_id=after_id,
+        limit=limit,
+        is_active=is_active,
+        created_after=created_after,
+        created_before=created_before
+    )
+    return ORJSONResponse(tenant_user_page_json.build(items=users, next_cursor=next_cursor))
+
 @router.get("/me", response_model=TenantUserResponse)
 async def get_current_user_profile(
-    current_user: TenantUser = Depends(get_current_tenant_user)
+    current_user: TenantUser = Depends(get_current_tenant_user_readonly)
 ):
     """Get current user profile from tenant database"""
-    return TenantUserResponse.model_validate(current_user)
+    return ORJSONResponse(current_user, tenant_user_json)
 
 @router.put("/me", response_model=TenantUserResponse)
 async def update_current_user_profile(
@@ -22,11 +75,41 @@ async def update_current_user_profile(
 ):
     """Update current user profile in tenant database"""
     
+    # The principal may have come from the user cache; write through a
+    # session-bound row so the update never starts from a stale copy
+    user = await db.get(TenantUser, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
     # Update user fields
     for field, value in user_update.model_dump(exclude_unset=True).items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
     
     await db.commit()
-    await db.refresh(current_user)
+    await db.refresh(user)
+    user_cache.invalidate(
+        user_cache_key("tenant", request.headers.get("X-TENANT"), user.id)
+    )
+    
+    return ORJSONResponse(user, tenant_user_json)
+
+@router.post("/import", response_model=BulkImportResult)
+async def import_users(
+    request: Request,
+    current_user: TenantUser = Depends(get_tenant_owner),
+    db: AsyncSession = Depends(get_tenant_db)
+):
+    """Bulk-create tenant users from a streamed CSV or NDJSON body (organization owner only)"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    format = IMPORT_FORMATS.get(content_type)
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload users as text/csv or application/x-ndjson"
+        )
     
-    return TenantUserResponse.model_validate(current_user)
\ No newline at end of file
+    result = await UserService.import_tenant_users(db, _iter_lines(request), format)
+    return ORJSONResponse(result, bulk_import_result_json)
\ No newline at end of file
@@ -1,11 +1,117 @@
 from pydantic_settings import BaseSettings
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     database_url: str
+    database_echo: bool = False
+    # Per-tenant query, pool and connection metrics served on /metrics. The
+    # output names every tenant; with a token set, scrapers must send it as
+    # "Authorization: Bearer <token>"
+    database_metrics_enabled: bool = True
+    metrics_token: Optional[str] = None
     jwt_secret_key: str
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 30
+    jwt_refresh_token_expire_days: int = 7
+    # Decoded access tokens kept in memory until they expire (0 disables)
+    token_cache_size: int = 10000
+    # Authenticated user rows cached between requests (0 size disables)
+    user_cache_size: int = 10000
+    user_cache_ttl_seconds: int = 60
+
+    # Worker threads for bcrypt hashing and verification, and how many of them
+    # bulk imports may hold at once so logins are never queued behind a batch
+    password_hash_workers: int = 4
+    password_hash_bulk_workers: int = 2
+
+    # Tenant engine cache
+    tenant_engine_cache_size: int = 100
+    tenant_engine_idle_ttl_seconds: int = 600
+
+    # Tenant isolation: "database" gives every tenant its own database,
+    # "schema" puts every tenant in its own schema of one shared database
+    tenant_isolation: str = "database"
+    tenant_schema_database_url: Optional[str] = None
+    tenant_schema_pool_size: int = 20
+    tenant_schema_max_overflow: int = 10
+
+    # Tenant directory: incremental refresh and full reload intervals, and how
+    # long unknown slugs are rejected without asking the core database again
+    tenant_directory_refresh_seconds: int = 60
+    tenant_directory_full_reload_seconds: int = 900
+    tenant_negative_cache_ttl_seconds: int = 30
+    tenant_negative_cache_size: int = 10000
+
+    # Bulk user import: rows hashed and inserted per batch, and the cap on
+    # per-row errors returned in the report
+    bulk_import_batch_size: int = 1000
+    bulk_import_max_reported_errors: int = 1000
+
+    # Cross-tenant fan-out queries
+    fanout_concurrency: int = 16
+    fanout_timeout_seconds: float = 30.0
+
+    # Background tenant provisioning; new tenant databases are cloned from
+    # a template database kept in sync with the tenant models
+    tenant_template_enabled: bool = True
+    provisioning_concurrency: int = 4
+    provisioning_max_attempts: int = 5
+    provisioning_retry_backoff_seconds: float = 1.0
+
+    # Connection budget shared by all tenant sessions (0 disables it) and the
+    # bounds for demand-sized tenant pools
+    tenant_connection_budget: int = 200
+    tenant_pool_min_size: int = 1
+    tenant_pool_max_size: int = 10
+
+    # SQL compiled once and shared by every tenant engine (0 gives each
+    # engine its own cache), and the statements asyncpg keeps prepared on
+    # each connection of the core and tenant engines (0 disables it)
+    tenant_compiled_cache_size: int = 2000
+    core_prepared_statement_cache_size: int = 100
+    tenant_prepared_statement_cache_size: int = 100
+
+    # Tenant databases spread over several PostgreSQL servers: server name ->
+    # URL without the database name, plus the replica of each server. The
+    # core database's server is always available as "default". New tenants
+    # go where the placement policy ("least_loaded" or "consistent_hash")
+    # puts them, never on a closed server; changed placements are re-read
+    # from the core database at the refresh interval, and all of them at the
+    # full reload interval
+    tenant_servers: Dict[str, str] = {}
+    tenant_replica_servers: Dict[str, str] = {}
+    tenant_placement_policy: str = "least_loaded"
+    tenant_servers_closed: List[str] = []
+    tenant_placement_refresh_seconds: int = 30
+    tenant_placement_full_reload_seconds: int = 900
+
+    # Read replicas: the core replica URL, whose server also holds the tenant
+    # databases, and the replica of the shared schema-mode database. Reads go
+    # to the primary for a while after this process writes to a database, and
+    # a replica that fails to connect is skipped for the markdown period.
+    database_replica_url: Optional[str] = None
+    tenant_schema_replica_url: Optional[str] = None
+    replica_read_your_writes_seconds: float = 5.0
+    replica_markdown_seconds: float = 30.0
+    replica_connect_timeout_seconds: float = 2.0
+
+    # Tenant schema migrations run in parallel processes, resumable from the state file
+    tenant_migration_workers: int = 8
+    tenant_migration_state_file: str = "tenant_migrations.json"
+
+    # Startup warms the pools of the most recently used tenants saved at the
+    # last shutdown; shutdown waits this long for open sessions to finish
+    tenant_warmup_count: int = 20
+    tenant_warmup_state_file: str = "tenant_warmup.json"
+    shutdown_drain_timeout_seconds: float = 30.0
+
+    # Fraction of requests run under cProfile; sampled requests slower than
+    # the threshold are saved to profile_dir
+    profile_sample_rate: float = 0.0
+    profile_slow_request_seconds: float = 1.0
+    profile_dir: str = "profiles"
+    server_timing_enabled: bool = True
 
     class Config:
         env_file = '.env'
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Type
+from sqlalchemy import inspect
+from app.config import settings
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a TTL or at a given time.
+
+    Expiry times are wall-clock timestamps so callers can pass deadlines
+    such as a JWT ``exp`` claim directly. A ``max_size`` of 0 disables the
+    cache entirely.
+    """
+
+    def __init__(self, max_size: int, ttl: float = 0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at is not None and time.time() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        if self.max_size <= 0:
+            return
+        if expires_at is None and self.ttl > 0:
+            expires_at = time.time() + self.ttl
+
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+# Authenticated principals, keyed by (context, tenant, user_id). Rows are
+# stored as plain column values so every hit gets its own unattached instance.
+user_cache = TTLCache(
+    max_size=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds
+)
+
+def user_cache_key(context: str, tenant: Optional[str], user_id: int) -> tuple:
+    return (context, tenant, user_id)
+
+def cache_user(key: tuple, user: Any):
+    user_cache.set(
+        key, {attr.key: getattr(user, attr.key) for attr in inspect(user).mapper.column_attrs}
+    )
+
+def get_cached_user(model: Type, key: tuple) -> Optional[Any]:
+    values = user_cache.get(key)
+    if values is None:
+        return None
+    return model(**values)
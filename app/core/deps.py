@@ -3,9 +3,12 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app.core.security import verify_token
+from app.core.cache import user_cache_key, cache_user, get_cached_user
+from app.core.profiling import timed
 from app.database.core import db_manager
+from app.services.tenant_directory import tenant_directory
 from app.schemas.auth import TokenData
-from app.models.core import CoreUser
+from app.models.core import CoreUser, Organization
 from app.models.tenant import TenantUser
 from sqlalchemy import select
 
@@ -15,7 +18,8 @@ async def get_current_user_token(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> TokenData:
     token = credentials.credentials
-    token_data = verify_token(token)
+    with timed("auth"):
+        token_data = verify_token(token)
     
     if token_data is None:
         raise HTTPException(
@@ -26,39 +30,117 @@ async def get_current_user_token(
     
     return token_data
 
+def _ensure_accepting():
+    if not db_manager.accepting:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is shutting down"
+        )
+
 async def get_core_db() -> AsyncSession:
-    session = await db_manager.get_core_session()
+    """Core session; no connection is checked out until its first statement"""
+    _ensure_accepting()
+    with timed("db"):
+        session = await db_manager.get_core_session()
     try:
         yield session
     finally:
         await session.close()
 
-async def get_tenant_db(request: Request) -> AsyncSession:
+async def get_core_read_db() -> AsyncSession:
+    """Core session for read-only routes; served by the replica when possible"""
+    _ensure_accepting()
+    with timed("db"):
+        session = await db_manager.get_core_read_session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def _routable_tenant(request: Request) -> str:
     tenant_slug = request.headers.get("X-TENANT")
     if not tenant_slug:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="X-TENANT header is required"
         )
+    _ensure_accepting()
     
-    session = await db_manager.get_tenant_session(tenant_slug)
+    # Reject unknown and inactive tenants before any engine is created for them
+    if not await tenant_directory.is_active(tenant_slug):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tenant not found"
+        )
+    return tenant_slug
+
+async def _open_tenant_session(request: Request, read_only: bool = False) -> AsyncSession:
+    tenant_slug = await _routable_tenant(request)
+    
+    # Engine creation counts as database time; the budget slot and connection
+    # are only taken when the session is first used
+    with timed("db"):
+        if read_only:
+            return await db_manager.get_tenant_read_session(tenant_slug)
+        return await db_manager.get_tenant_session(tenant_slug)
+
+async def get_tenant_db(request: Request) -> AsyncSession:
+    session = await _open_tenant_session(request)
     try:
         yield session
     finally:
         await session.close()
 
-async def get_current_core_user(
-    token_data: TokenData = Depends(get_current_user_token),
-    db: AsyncSession = Depends(get_core_db)
-) -> CoreUser:
+async def get_tenant_read_db(request: Request) -> AsyncSession:
+    """Tenant session for read-only routes; served by the replica when possible"""
+    session = await _open_tenant_session(request, read_only=True)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def get_optional_tenant_db(request: Request) -> Optional[AsyncSession]:
+    """Tenant session when X-TENANT is set, otherwise None (for routes serving both)"""
+    if not request.headers.get("X-TENANT"):
+        yield None
+        return
+    session = await _open_tenant_session(request)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def get_optional_tenant_read_db(request: Request) -> Optional[AsyncSession]:
+    """Read-only counterpart of ``get_optional_tenant_db``"""
+    if not request.headers.get("X-TENANT"):
+        yield None
+        return
+    session = await _open_tenant_session(request, read_only=True)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def _load_user(model, db: AsyncSession, cache_key: tuple):
+    """Read-through lookup of the authenticated user by id"""
+    user = get_cached_user(model, cache_key)
+    if user is not None:
+        return user
+    
+    result = await db.execute(select(model).where(model.id == cache_key[-1]))
+    user = result.scalar_one_or_none()
+    if user is not None:
+        cache_user(cache_key, user)
+    return user
+
+async def _core_user(token_data: TokenData, db: AsyncSession) -> CoreUser:
     if token_data.context != "core":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Core authentication required"
         )
     
-    result = await db.execute(select(CoreUser).where(CoreUser.id == token_data.user_id))
-    user = result.scalar_one_or_none()
+    user = await _load_user(CoreUser, db, user_cache_key("core", None, token_data.user_id))
     
     if user is None:
         raise HTTPException(
@@ -68,11 +150,7 @@ async def get_current_core_user(
     
     return user
 
-async def get_current_tenant_user(
-    request: Request,
-    token_data: TokenData = Depends(get_current_user_token),
-    db: AsyncSession = Depends(get_tenant_db)
-) -> TenantUser:
+async def _tenant_user(request: Request, token_data: TokenData, db: AsyncSession) -> TenantUser:
     tenant_slug = request.headers.get("X-TENANT")
     
     if token_data.context != "tenant" or token_data.tenant != tenant_slug:
@@ -81,8 +159,9 @@ async def get_current_tenant_user(
             detail="Tenant authentication required for this tenant"
         )
     
-    result = await db.execute(select(TenantUser).where(TenantUser.id == token_data.user_id))
-    user = result.scalar_one_or_none()
+    user = await _load_user(
+        TenantUser, db, user_cache_key("tenant", tenant_slug, token_data.user_id)
+    )
     
     if user is None:
         raise HTTPException(
@@ -92,5 +171,65 @@ async def get_current_tenant_user(
     
     return user
 
+async def get_current_core_user(
+    token_data: TokenData = Depends(get_current_user_token),
+    db: AsyncSession = Depends(get_core_db)
+) -> CoreUser:
+    return await _core_user(token_data, db)
+
+async def get_current_core_user_readonly(
+    token_data: TokenData = Depends(get_current_user_token),
+    db: AsyncSession = Depends(get_core_read_db)
+) -> CoreUser:
+    """Core principal loaded through the read session, for read-only routes"""
+    return await _core_user(token_data, db)
+
+async def get_current_tenant_user(
+    request: Request,
+    token_data: TokenData = Depends(get_current_user_token),
+    db: AsyncSession = Depends(get_tenant_db)
+) -> TenantUser:
+    return await _tenant_user(request, token_data, db)
+
+async def get_current_tenant_user_readonly(
+    request: Request,
+    token_data: TokenData = Depends(get_current_user_token),
+    db: AsyncSession = Depends(get_tenant_read_db)
+) -> TenantUser:
+    """Tenant principal loaded through the read session, for read-only routes"""
+    return await _tenant_user(request, token_data, db)
+
+async def _tenant_owner(request: Request, current_user: TenantUser, core_db: AsyncSession) -> TenantUser:
+    # The owner's tenant account is synced from their core account by email
+    owner_email = await core_db.scalar(
+        select(CoreUser.email)
+        .join(Organization, Organization.owner_id == CoreUser.id)
+        .where(Organization.slug == request.headers.get("X-TENANT"))
+    )
+    
+    if owner_email is None or owner_email != current_user.email:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the organization owner can do this"
+        )
+    
+    return current_user
+
+async def get_tenant_owner(
+    request: Request,
+    current_user: TenantUser = Depends(get_current_tenant_user),
+    core_db: AsyncSession = Depends(get_core_read_db)
+) -> TenantUser:
+    """Tenant principal that owns the organization, for tenant-wide admin routes"""
+    return await _tenant_owner(request, current_user, core_db)
+
+async def get_tenant_owner_readonly(
+    request: Request,
+    current_user: TenantUser = Depends(get_current_tenant_user_readonly),
+    core_db: AsyncSession = Depends(get_core_read_db)
+) -> TenantUser:
+    """Organization owner loaded through the read session, for read-only admin routes"""
+    return await _tenant_owner(request, current_user, core_db)
+
 def get_tenant_slug(request: Request) -> Optional[str]:
     return request.headers.get("X-TENANT")
\ No newline at end of file
@@ -0,0 +1,109 @@
+import cProfile
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Optional
+from fastapi.responses import JSONResponse
+from app.config import settings
+
+# Seconds spent per phase ("auth", "db", "serialize") by the current request
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+def record_phase(phase: str, seconds: float):
+    """Add ``seconds`` to ``phase`` of the request being handled, if any"""
+    phases = _phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+@contextmanager
+def timed(phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started)
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that reports its rendering time as the serialize phase"""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+def _filename_part(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9-]+", "_", value).strip("_")[:64] or "none"
+
+class ProfilingMiddleware:
+    """Times request phases and profiles a sample of requests.
+
+    Every response carries a ``Server-Timing`` header with the time spent in
+    auth, the database and serialization. A ``profile_sample_rate`` fraction
+    of requests also runs under cProfile; when such a request takes longer
+    than ``profile_slow_request_seconds`` its stats are written to
+    ``profile_dir`` as a pstats file named after the route and tenant.
+
+    cProfile follows the thread rather than the request, so only one request
+    is profiled at a time and its profile also contains whatever other
+    requests ran on the event loop meanwhile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._profiling = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: Dict[str, float] = {}
+        token = _phases.set(phases)
+        started = time.perf_counter()
+
+        profiler = None
+        if not self._profiling and settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate:
+            self._profiling = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.server_timing_enabled:
+                phases["total"] = time.perf_counter() - started
+                timing = ", ".join(
+                    f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in phases.items()
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            _phases.reset(token)
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+                if elapsed >= settings.profile_slow_request_seconds:
+                    self._save(profiler, scope, elapsed)
+
+    def _save(self, profiler: cProfile.Profile, scope, elapsed: float):
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope.get("path", "")
+        headers = dict(scope.get("headers", []))
+        tenant = headers.get(b"x-tenant", b"").decode("latin-1")
+
+        directory = Path(settings.profile_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = "{:.0f}_{}_{}_{}_{:.0f}ms.pstats".format(
+            time.time() * 1000,
+            scope.get("method", ""),
+            _filename_part(path),
+            _filename_part(tenant),
+            elapsed * 1000
+        )
+        profiler.dump_stats(str(directory / name))
@@ -1,8 +1,13 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.core.cache import TTLCache
+from app.core.profiling import timed
 from app.schemas.auth import TokenData
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -13,27 +18,117 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None):
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+)
+_hash_lock = threading.Lock()
+_hash_in_flight = 0
+_hash_running = 0
+
+def _run_counted(fn: Callable, *args):
+    global _hash_running
+    with _hash_lock:
+        _hash_running += 1
+    try:
+        return fn(*args)
+    finally:
+        with _hash_lock:
+            _hash_running -= 1
+
+async def _run_in_hash_pool(fn: Callable, *args):
+    global _hash_in_flight
+    _hash_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        with timed("auth"):
+            return await loop.run_in_executor(_hash_executor, _run_counted, fn, *args)
+    finally:
+        _hash_in_flight -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+_bulk_hash_slots: Optional[asyncio.Semaphore] = None
+
+async def get_password_hash_bulk_async(password: str) -> str:
+    """Hash for bulk work, which shares at most ``password_hash_bulk_workers`` workers"""
+    global _bulk_hash_slots
+    if _bulk_hash_slots is None:
+        # Always leave at least one worker for interactive logins
+        limit = min(settings.password_hash_bulk_workers, settings.password_hash_workers - 1)
+        _bulk_hash_slots = asyncio.Semaphore(max(limit, 1))
+    async with _bulk_hash_slots:
+        return await get_password_hash_async(password)
+
+def password_hash_stats() -> Dict[str, int]:
+    """Occupancy of the password hashing pool"""
+    return {
+        "workers": settings.password_hash_workers,
+        "in_flight": _hash_in_flight,
+        "running": _hash_running,
+        "queue_depth": max(0, _hash_in_flight - _hash_running),
+    }
+
+def _encode_token(data: Dict[str, Any], expire: datetime) -> str:
     to_encode = data.copy()
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    return encoded_jwt
+
+def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None):
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.jwt_access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
-    return encoded_jwt
+    return _encode_token(data, expire)
 
-def verify_token(token: str) -> Optional[TokenData]:
+def create_refresh_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None):
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(days=settings.jwt_refresh_token_expire_days)
+    
+    return _encode_token({**data, "type": "refresh"}, expire)
+
+# Access tokens are immutable, so a decoded token is valid until its own expiry
+_token_cache = TTLCache(max_size=settings.token_cache_size)
+
+def _decode_token(token: str, token_type: str) -> Optional[Tuple[TokenData, int]]:
     try:
         payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
         user_id: int = payload.get("user_id")
         context: str = payload.get("context")
         tenant: str = payload.get("tenant")
         
-        if user_id is None:
+        if user_id is None or payload.get("type", "access") != token_type:
             return None
             
-        return TokenData(user_id=user_id, context=context, tenant=tenant)
+        return TokenData(user_id=user_id, context=context, tenant=tenant), payload["exp"]
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def verify_token(token: str) -> Optional[TokenData]:
+    token_data = _token_cache.get(token)
+    if token_data is not None:
+        return token_data
+    
+    decoded = _decode_token(token, "access")
+    if decoded is None:
+        return None
+    
+    token_data, expires_at = decoded
+    _token_cache.set(token, token_data, expires_at=expires_at)
+    return token_data
+
+def verify_refresh_token(token: str) -> Optional[TokenData]:
+    decoded = _decode_token(token, "refresh")
+    return decoded[0] if decoded else None
+
+def token_cache_stats() -> Dict[str, float]:
+    """Hit rate and size of the decoded access token cache"""
+    return _token_cache.stats()
@@ -0,0 +1,71 @@
+from dataclasses import make_dataclass
+from operator import attrgetter
+from typing import Any, Callable, Optional, Type
+import orjson
+from pydantic import BaseModel
+from starlette.responses import Response
+from app.core.profiling import timed
+
+class JSONSerializer:
+    """Single-pass conversion of ORM rows to a response schema's JSON shape.
+
+    The schema's fields are read straight off the object into a
+    dataclass, which orjson encodes natively: no pydantic validation and no
+    intermediate dict. Fields listed in ``nested`` are converted with their
+    own serializer (lists element by element). The schema still documents
+    the route through ``response_model``.
+    """
+
+    def __init__(self, schema: Type[BaseModel], **nested: "JSONSerializer"):
+        self.fields = tuple(schema.model_fields)
+        self.row_type = make_dataclass(f"{schema.__name__}JSON", self.fields)
+        self._get = attrgetter(*self.fields)
+        self._nested = [(self.fields.index(name), name, convert) for name, convert in nested.items()]
+
+    def __call__(self, obj: Any) -> Any:
+        values = self._get(obj)
+        if len(self.fields) == 1:
+            values = (values,)
+        if self._nested:
+            values = list(values)
+            for index, _, convert in self._nested:
+                values[index] = _convert(convert, values[index])
+        return self.row_type(*values)
+
+    def build(self, **values: Any) -> Any:
+        """JSON row from explicit field values, for responses not read off one object"""
+        for _, name, convert in self._nested:
+            values[name] = _convert(convert, values[name])
+        return self.row_type(**values)
+
+def _convert(convert: Callable[[Any], Any], value: Any) -> Any:
+    if isinstance(value, list):
+        return [convert(item) for item in value]
+    return None if value is None else convert(value)
+
+class ORJSONResponse(Response):
+    """JSON response rendered by orjson, optionally through a JSONSerializer.
+
+    Returning a response from a route skips FastAPI's own re-validation and
+    encoding against ``response_model``.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        serializer: Optional[Callable[[Any], Any]] = None,
+        status_code: int = 200,
+        headers: Optional[dict] = None
+    ):
+        # Response.__init__ renders immediately, so the serializer must be set first
+        self._serializer = serializer
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            if self._serializer is not None:
+                content = self._serializer(content)
+            # "Z" for UTC matches pydantic's JSON output for aware datetimes
+            return orjson.dumps(content, option=orjson.OPT_UTC_Z)
@@ -0,0 +1,130 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict
+
+class ConnectionBudget:
+    """Process-wide limit on concurrently held tenant connections.
+
+    Each tenant session takes one slot from its first statement until it is
+    closed. When every slot is taken, waiters are queued per tenant and freed
+    slots are handed out round-robin across tenants, so a single busy tenant
+    cannot starve the rest. Recent per-tenant concurrency is tracked so
+    tenant pools can be sized from actual demand.
+    """
+
+    # Weight of the newest sample in the per-tenant demand average
+    DEMAND_SMOOTHING = 0.2
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._in_use_by_tenant: Dict[str, int] = {}
+        self._demand: Dict[str, float] = {}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        # Tenants with queued waiters, in the order they will next be served
+        self._ready: Deque[str] = deque()
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self._recent_waits: Deque[float] = deque(maxlen=1000)
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit > 0
+
+    async def acquire(self, tenant: str):
+        if not self.enabled or (self.in_use < self.limit and not self._ready):
+            self._grant(tenant)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._waiters.get(tenant)
+        if queue is None:
+            queue = self._waiters[tenant] = deque()
+            self._ready.append(tenant)
+        queue.append(future)
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted as we were cancelled; hand it on
+                self.release(tenant)
+            else:
+                self._discard_waiter(tenant, future)
+            raise
+        self._record_wait(time.monotonic() - started)
+
+    def release(self, tenant: str):
+        self.in_use -= 1
+        remaining = self._in_use_by_tenant.get(tenant, 1) - 1
+        if remaining > 0:
+            self._in_use_by_tenant[tenant] = remaining
+        else:
+            self._in_use_by_tenant.pop(tenant, None)
+        self._wake_waiters()
+
+    def suggested_pool_size(self, tenant: str, minimum: int, maximum: int) -> int:
+        """Pool size for a tenant engine based on its recent concurrency"""
+        demand = max(self._demand.get(tenant, 0.0), self._in_use_by_tenant.get(tenant, 0))
+        return max(minimum, min(maximum, math.ceil(demand)))
+
+    def stats(self) -> Dict[str, float]:
+        recent = sorted(self._recent_waits)
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "waiting": sum(len(queue) for queue in self._waiters.values()),
+            "waits": self.waits,
+            "wait_seconds_total": self.wait_seconds_total,
+            "max_wait_seconds": self.max_wait_seconds,
+            "p50_wait_seconds": _percentile(recent, 0.50),
+            "p95_wait_seconds": _percentile(recent, 0.95),
+        }
+
+    def _grant(self, tenant: str):
+        self.in_use += 1
+        current = self._in_use_by_tenant.get(tenant, 0) + 1
+        self._in_use_by_tenant[tenant] = current
+        previous = self._demand.get(tenant, float(current))
+        self._demand[tenant] = previous + self.DEMAND_SMOOTHING * (current - previous)
+
+    def _wake_waiters(self):
+        while self._ready and (not self.enabled or self.in_use < self.limit):
+            tenant = self._ready.popleft()
+            queue = self._waiters[tenant]
+            future = queue.popleft()
+            if queue:
+                self._ready.append(tenant)
+            else:
+                del self._waiters[tenant]
+            if future.done():
+                continue
+            self._grant(tenant)
+            future.set_result(None)
+
+    def _discard_waiter(self, tenant: str, future: asyncio.Future):
+        queue = self._waiters.get(tenant)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            return
+        if not queue:
+            del self._waiters[tenant]
+            self._ready.remove(tenant)
+
+    def _record_wait(self, seconds: float):
+        self.waits += 1
+        self.wait_seconds_total += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        self._recent_waits.append(seconds)
+
+def _percentile(ordered, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
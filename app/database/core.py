@@ -1,87 +1,700 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from typing import Dict, Optional
+from sqlalchemy import event, make_url, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
+from typing import Awaitable, Callable, Dict, List, Optional
+from functools import partial, wraps
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import time
 import asyncpg
 from app.config import settings
+from app.core.profiling import timed
+from app.database.budget import ConnectionBudget
+from app.database.engine_cache import CachedEngine, TenantEngineCache
+from app.database.metrics import (
+    CORE_LABEL, REPLICA_LABEL_SUFFIX, SCHEMA_POOL_LABEL, InstrumentedPool, db_metrics
+)
+from app.database.placement import DEFAULT_SERVER, TenantPlacements
+from app.database.statement_cache import SharedCompiledCache
+from app.database.tenant_migrations import stamp_head, tenant_head_revision
 
 class Base(DeclarativeBase):
     pass
 
+class TrackedSession(AsyncSession):
+    """AsyncSession that reports back to the manager (and budget) when closed.
+    
+    ``before_first_use`` runs once, before the first method that may touch
+    the database, so a session that is opened but never used costs no
+    budget slot and no pooled connection.
+    """
+    
+    on_close: Optional[Callable[[], None]] = None
+    before_first_use: Optional[Callable[[], Awaitable[None]]] = None
+    
+    async def _first_use(self):
+        hook, self.before_first_use = self.before_first_use, None
+        await hook()
+    
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            on_close, self.on_close = self.on_close, None
+            if on_close is not None:
+                on_close()
+
+def _after_first_use(name: str):
+    method = getattr(AsyncSession, name)
+    
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if self.before_first_use is not None:
+            await self._first_use()
+        return await method(self, *args, **kwargs)
+    return wrapper
+
+for _name in (
+    "connection", "execute", "scalar", "scalars", "get", "get_one", "stream", "stream_scalars",
+    "merge", "delete", "refresh", "flush", "commit", "run_sync"
+):
+    setattr(TrackedSession, _name, _after_first_use(_name))
+
+class PrimarySession(Session):
+    """Session on a primary database; notes in ``info`` whether it wrote"""
+
+@event.listens_for(PrimarySession, "after_flush")
+def _note_flush(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _note_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+class TenantSchemaSession(PrimarySession):
+    """Session that scopes every transaction to the tenant's schema"""
+
+class TenantSchemaReplicaSession(Session):
+    """Schema-scoped session on the replica"""
+
+@event.listens_for(TenantSchemaSession, "after_begin")
+@event.listens_for(TenantSchemaReplicaSession, "after_begin")
+def _set_tenant_search_path(session, transaction, connection):
+    schema = session.info.get("tenant_schema")
+    if schema:
+        # Lets the metrics attribute statements on the shared pool to the tenant
+        connection.info["tenant"] = session.info["tenant"]
+        # SET LOCAL ends with the transaction, so nothing leaks into the shared pool
+        quoted = connection.dialect.identifier_preparer.quote_identifier(schema)
+        connection.exec_driver_sql(f"SET LOCAL search_path TO {quoted}")
+
+def tenant_schema_name(tenant_slug: str) -> str:
+    return f"tenant_{tenant_slug}"
+
+# Slugs cannot contain underscores, so this name never collides with a tenant
+TEMPLATE_DATABASE = "multitenant__template"
+
+def tenant_metadata_fingerprint() -> str:
+    """Hash of the PostgreSQL DDL for every tenant table and index"""
+    from app.models.tenant import TenantBase
+    dialect = postgresql.dialect()
+    # The stamped revision is part of the template too
+    ddl = [tenant_head_revision()]
+    for table in TenantBase.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            ddl.append(str(CreateIndex(index).compile(dialect=dialect)))
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()
+
+def insert_ignoring_conflicts(db: AsyncSession, model, index_elements):
+    """INSERT for ``model`` that skips rows conflicting on ``index_elements``"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported for {dialect}")
+    return insert(model).on_conflict_do_nothing(index_elements=index_elements)
+
+def _load_recent_tenants() -> List[str]:
+    path = Path(settings.tenant_warmup_state_file)
+    try:
+        return json.loads(path.read_text())["tenants"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+def _save_recent_tenants(tenants: List[str]):
+    path = Path(settings.tenant_warmup_state_file)
+    try:
+        path.write_text(json.dumps({"tenants": tenants}))
+    except OSError:
+        # Losing the list only costs the next start its warm-up
+        pass
+
 class DatabaseManager:
     def __init__(self):
-        self._engines: Dict[str, any] = {}
-        self._sessions: Dict[str, any] = {}
+        self._core_engine = None
+        self._core_sessionmaker = None
+        self._schema_engine = None
+        self._schema_sessionmaker = None
+        # Server name -> fingerprint of its verified template database
+        self._template_fingerprints: Dict[str, str] = {}
+        self._template_lock = asyncio.Lock()
+        self._connection_budget = ConnectionBudget(settings.tenant_connection_budget)
+        self.placements = TenantPlacements(self.get_core_session)
+        self.placements.on_move = self._tenant_moved
+        # Tenant schemas are identical, so their engines share compiled SQL
+        self._compiled_cache = (
+            SharedCompiledCache(settings.tenant_compiled_cache_size)
+            if settings.tenant_compiled_cache_size > 0 else None
+        )
+        self._tenant_engines = TenantEngineCache(
+            self._create_tenant_engine,
+            max_size=settings.tenant_engine_cache_size,
+            idle_ttl=settings.tenant_engine_idle_ttl_seconds,
+            session_class=TrackedSession,
+            sync_session_class=PrimarySession
+        )
+        self._core_replica_engine = None
+        self._core_replica_sessionmaker = None
+        self._schema_replica_engine = None
+        self._schema_replica_sessionmaker = None
+        self._tenant_replica_engines = TenantEngineCache(
+            self._create_tenant_replica_engine,
+            max_size=settings.tenant_engine_cache_size,
+            idle_ttl=settings.tenant_engine_idle_ttl_seconds,
+            session_class=TrackedSession
+        )
+        # When each database was last written through this process, for read-your-writes
+        self._last_write: Dict[str, float] = {}
+        # Replica role ("core" or "tenant") -> time until which it is skipped after failing
+        self._replica_down_until: Dict[str, float] = {}
+        # Cleared on shutdown so request dependencies stop handing out sessions
+        self.accepting = True
+        self._open_sessions = 0
+        self._idle: Optional[asyncio.Event] = None
         
+    def _create_engine(
+        self,
+        url: str,
+        metrics_label: str,
+        prepared_statement_cache_size: Optional[int] = None,
+        compiled_cache: Optional[SharedCompiledCache] = None,
+        **pool_options
+    ):
+        connect_args = {}
+        if prepared_statement_cache_size is not None and make_url(url).get_driver_name() == "asyncpg":
+            # Statements asyncpg keeps prepared per connection (0 disables it)
+            connect_args["prepared_statement_cache_size"] = prepared_statement_cache_size
+        if compiled_cache is not None:
+            # No private compiled cache; statements go to the shared one below
+            pool_options["query_cache_size"] = 0
+        
+        engine = create_async_engine(
+            url,
+            echo=settings.database_echo,
+            pool_pre_ping=True,
+            poolclass=InstrumentedPool,
+            connect_args=connect_args,
+            **pool_options
+        )
+        if compiled_cache is not None:
+            engine.sync_engine.update_execution_options(compiled_cache=compiled_cache)
+        db_metrics.instrument(engine, metrics_label)
+        return engine
+    
     async def get_core_engine(self):
-        if "core" not in self._engines:
-            self._engines["core"] = create_async_engine(
+        if self._core_engine is None:
+            self._core_engine = self._create_engine(
                 settings.database_url,
-                echo=True,
-                pool_pre_ping=True
+                CORE_LABEL,
+                prepared_statement_cache_size=settings.core_prepared_statement_cache_size
             )
-        return self._engines["core"]
+        return self._core_engine
     
-    async def get_tenant_engine(self, tenant_slug: str):
-        if tenant_slug not in self._engines:
-            # Construct tenant database URL
-            base_url = settings.database_url.rsplit('/', 1)[0]
-            tenant_db_url = f"{base_url}/multitenant_{tenant_slug}"
-            
-            self._engines[tenant_slug] = create_async_engine(
-                tenant_db_url,
-                echo=True,
-                pool_pre_ping=True
+    def tenant_database_url(self, tenant_slug: str, server: Optional[str] = None) -> str:
+        """URL of the tenant's database, on its placed server unless ``server`` is given"""
+        if self.uses_schemas:
+            return settings.tenant_schema_database_url or settings.database_url
+        base_url = self.placements.server_urls()[server or self.placements.server_of(tenant_slug)]
+        return f"{base_url}/multitenant_{tenant_slug}"
+    
+    def tenant_replica_url(self, tenant_slug: str) -> str:
+        # The replica of the tenant's server holds the same databases as the primary
+        base_url = self.placements.replica_url(self.placements.server_of(tenant_slug))
+        return f"{base_url}/multitenant_{tenant_slug}"
+    
+    def _create_tenant_engine(self, tenant_slug: str):
+        # Size the pool from the tenant's recent demand; overflow covers bursts
+        # while the connection budget caps the total across tenants
+        pool_size = self._connection_budget.suggested_pool_size(
+            tenant_slug, settings.tenant_pool_min_size, settings.tenant_pool_max_size
+        )
+        return self._create_engine(
+            self.tenant_database_url(tenant_slug),
+            tenant_slug,
+            prepared_statement_cache_size=settings.tenant_prepared_statement_cache_size,
+            compiled_cache=self._compiled_cache,
+            pool_size=pool_size,
+            max_overflow=settings.tenant_pool_max_size - pool_size
+        )
+    
+    def _create_tenant_replica_engine(self, tenant_slug: str):
+        pool_size = self._connection_budget.suggested_pool_size(
+            tenant_slug, settings.tenant_pool_min_size, settings.tenant_pool_max_size
+        )
+        return self._create_engine(
+            self.tenant_replica_url(tenant_slug),
+            f"{tenant_slug}{REPLICA_LABEL_SUFFIX}",
+            prepared_statement_cache_size=settings.tenant_prepared_statement_cache_size,
+            compiled_cache=self._compiled_cache,
+            pool_size=pool_size,
+            max_overflow=settings.tenant_pool_max_size - pool_size
+        )
+    
+    @property
+    def uses_schemas(self) -> bool:
+        return settings.tenant_isolation == "schema"
+    
+    def _get_schema_engine(self):
+        if self._schema_engine is None:
+            self._schema_engine = self._create_engine(
+                settings.tenant_schema_database_url or settings.database_url,
+                SCHEMA_POOL_LABEL,
+                prepared_statement_cache_size=settings.tenant_prepared_statement_cache_size,
+                pool_size=settings.tenant_schema_pool_size,
+                max_overflow=settings.tenant_schema_max_overflow
+            )
+            self._schema_sessionmaker = async_sessionmaker(
+                self._schema_engine,
+                class_=TrackedSession,
+                sync_session_class=TenantSchemaSession,
+                expire_on_commit=False
             )
-        return self._engines[tenant_slug]
+        return self._schema_engine
+    
+    async def get_tenant_engine(self, tenant_slug: str):
+        if self.uses_schemas:
+            return self._get_schema_engine()
+        return (await self._located_engine(self._tenant_engines, tenant_slug)).engine
     
     async def get_core_session(self) -> AsyncSession:
         engine = await self.get_core_engine()
-        if "core" not in self._sessions:
-            self._sessions["core"] = async_sessionmaker(
-                engine, class_=AsyncSession, expire_on_commit=False
+        if self._core_sessionmaker is None:
+            self._core_sessionmaker = async_sessionmaker(
+                engine, class_=TrackedSession, sync_session_class=PrimarySession, expire_on_commit=False
             )
-        return self._sessions["core"]()
+        return self._track(self._core_sessionmaker())
     
     async def get_tenant_session(self, tenant_slug: str) -> AsyncSession:
-        engine = await self.get_tenant_engine(tenant_slug)
-        if tenant_slug not in self._sessions:
-            self._sessions[tenant_slug] = async_sessionmaker(
-                engine, class_=AsyncSession, expire_on_commit=False
+        if self.uses_schemas:
+            # All tenants share one pool; the schema is applied per transaction
+            self._get_schema_engine()
+            session = self._schema_sessionmaker(
+                info={
+                    "tenant": tenant_slug,
+                    "tenant_schema": tenant_schema_name(tenant_slug)
+                }
+            )
+        else:
+            entry = await self._located_engine(self._tenant_engines, tenant_slug)
+            session = entry.sessionmaker(info={"tenant": tenant_slug})
+        return self._track(session, budget_tenant=tenant_slug)
+    
+    def _get_schema_replica_engine(self):
+        if self._schema_replica_engine is None:
+            self._schema_replica_engine = self._create_engine(
+                settings.tenant_schema_replica_url,
+                f"{SCHEMA_POOL_LABEL}{REPLICA_LABEL_SUFFIX}",
+                prepared_statement_cache_size=settings.tenant_prepared_statement_cache_size,
+                pool_size=settings.tenant_schema_pool_size,
+                max_overflow=settings.tenant_schema_max_overflow
+            )
+            self._schema_replica_sessionmaker = async_sessionmaker(
+                self._schema_replica_engine,
+                class_=TrackedSession,
+                sync_session_class=TenantSchemaReplicaSession,
+                expire_on_commit=False
+            )
+        return self._schema_replica_engine
+    
+    async def get_core_read_session(self) -> AsyncSession:
+        """Session for read-only work, on the core replica when one can serve it"""
+        if not self._use_replica("core", CORE_LABEL):
+            return await self.get_core_session()
+        if self._core_replica_engine is None:
+            self._core_replica_engine = self._create_engine(
+                settings.database_replica_url,
+                f"{CORE_LABEL}{REPLICA_LABEL_SUFFIX}",
+                prepared_statement_cache_size=settings.core_prepared_statement_cache_size
+            )
+            self._core_replica_sessionmaker = async_sessionmaker(
+                self._core_replica_engine, class_=TrackedSession, expire_on_commit=False
+            )
+        return self._track(
+            self._core_replica_sessionmaker(),
+            first_use=self._connect_or_fail_over("core", self.get_core_engine)
+        )
+    
+    async def get_tenant_read_session(self, tenant_slug: str) -> AsyncSession:
+        """Session for read-only work, on the tenant replica when one can serve it"""
+        if not self.uses_schemas:
+            await self.placements.locate(tenant_slug)
+        if not self._use_replica("tenant", tenant_slug):
+            return await self.get_tenant_session(tenant_slug)
+        if self.uses_schemas:
+            self._get_schema_replica_engine()
+            session = self._schema_replica_sessionmaker(
+                info={
+                    "tenant": tenant_slug,
+                    "tenant_schema": tenant_schema_name(tenant_slug)
+                }
+            )
+        else:
+            entry = await self._located_engine(self._tenant_replica_engines, tenant_slug)
+            session = entry.sessionmaker(info={"tenant": tenant_slug})
+        return self._track(
+            session,
+            budget_tenant=tenant_slug,
+            first_use=self._connect_or_fail_over("tenant", partial(self.get_tenant_engine, tenant_slug))
+        )
+    
+    def _use_replica(self, role: str, database: str) -> bool:
+        if role == "tenant" and self.uses_schemas:
+            configured = settings.tenant_schema_replica_url is not None
+        elif role == "tenant":
+            configured = self.placements.replica_url(self.placements.server_of(database)) is not None
+        else:
+            configured = settings.database_replica_url is not None
+        if not configured:
+            return False
+        
+        now = time.monotonic()
+        if now < self._replica_down_until.get(role, 0.0):
+            return False
+        # Replication lag could hide a write this process just made
+        last_write = self._last_write.get(database)
+        return last_write is None or now - last_write >= settings.replica_read_your_writes_seconds
+    
+    async def _located_engine(self, engines: TenantEngineCache, tenant_slug: str) -> CachedEngine:
+        """Cached engine for the tenant, rebuilt if it was made for another server"""
+        server = await self.placements.locate(tenant_slug)
+        return engines.get(tenant_slug, tag=server)
+    
+    def _tenant_moved(self, tenant_slug: str, old_server: str, new_server: str):
+        # Engines still point at the old server; new sessions reconnect on the new one
+        self._tenant_engines.discard(tenant_slug)
+        self._tenant_replica_engines.discard(tenant_slug)
+    
+    def _connect_or_fail_over(
+        self,
+        role: str,
+        primary_engine: Callable[[], Awaitable[AsyncEngine]]
+    ) -> Callable[[TrackedSession], Awaitable[None]]:
+        """First-use hook that moves a replica session to the primary if the replica is down"""
+        async def connect(session: TrackedSession):
+            try:
+                await asyncio.wait_for(session.connection(), settings.replica_connect_timeout_seconds)
+            except Exception:
+                # Unreachable or failing replica: skip it for a while and read from the primary
+                self._replica_down_until[role] = time.monotonic() + settings.replica_markdown_seconds
+                # Nothing has run yet, so the session can simply be rebound
+                await AsyncSession.close(session)
+                engine = await primary_engine()
+                session.bind = engine
+                session.sync_session.bind = engine.sync_engine
+        return connect
+    
+    def _track(
+        self,
+        session: TrackedSession,
+        budget_tenant: Optional[str] = None,
+        first_use: Optional[Callable[[TrackedSession], Awaitable[None]]] = None
+    ) -> TrackedSession:
+        """Count the session as open; its budget slot is only taken on first use"""
+        self._open_sessions += 1
+        holds_slot = False
+        
+        async def before_first_use():
+            nonlocal holds_slot
+            if budget_tenant is not None:
+                # Budget waits count as database time
+                with timed("db"):
+                    await self._connection_budget.acquire(budget_tenant)
+                holds_slot = True
+            if first_use is not None:
+                await first_use(session)
+        
+        def on_close():
+            self._open_sessions -= 1
+            if session.info.get("wrote"):
+                self._last_write[session.info.get("tenant", CORE_LABEL)] = time.monotonic()
+            if holds_slot:
+                self._connection_budget.release(budget_tenant)
+            if self._open_sessions == 0 and self._idle is not None:
+                self._idle.set()
+        
+        if budget_tenant is not None or first_use is not None:
+            session.before_first_use = before_first_use
+        session.on_close = on_close
+        return session
+    
+    async def startup(self) -> int:
+        """Connect the core pool and warm the pools of recently active tenants.
+        
+        Tenants are read from the list saved by the previous ``shutdown``.
+        Returns the number of tenant pools warmed.
+        """
+        self.accepting = True
+        engine = await self.get_core_engine()
+        async with engine.connect():
+            pass
+        
+        if self.uses_schemas:
+            # Every tenant shares the schema pool, so there is one pool to warm
+            await self._warm_pool(self._get_schema_engine(), settings.tenant_schema_pool_size)
+            return 0
+        
+        tenants = _load_recent_tenants()[:settings.tenant_warmup_count]
+        results = await asyncio.gather(
+            *(self._warm_tenant(tenant_slug) for tenant_slug in tenants),
+            return_exceptions=True
+        )
+        return sum(1 for result in results if result is None)
+    
+    async def _warm_tenant(self, tenant_slug: str):
+        try:
+            # Locate first: placements are not loaded yet on startup
+            await self._warm_pool(
+                await self.get_tenant_engine(tenant_slug), settings.tenant_pool_min_size
+            )
+        except Exception:
+            # The tenant may have been dropped since the list was saved
+            self._tenant_engines.discard(tenant_slug)
+            raise
+    
+    async def _warm_pool(self, engine, size: int):
+        # Hold the connections at once so the pool really opens ``size`` of them
+        connections = [engine.connect() for _ in range(max(size, 1))]
+        try:
+            await asyncio.gather(*(connection.start() for connection in connections))
+        finally:
+            # Connections that failed to start have nothing to close
+            await asyncio.gather(
+                *(connection.close() for connection in connections), return_exceptions=True
+            )
+    
+    async def wait_idle(self, timeout: float) -> bool:
+        """Wait until every session handed out has been closed"""
+        if self._open_sessions == 0:
+            return True
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._idle = None
+    
+    async def shutdown(self, timeout: float) -> bool:
+        """Stop handing out request sessions, drain open ones and dispose every engine.
+        
+        Returns False when sessions were still open after ``timeout`` seconds;
+        their connections are closed by the dispose.
+        """
+        self.accepting = False
+        _save_recent_tenants(self._tenant_engines.recent(settings.tenant_warmup_count))
+        drained = await self.wait_idle(timeout)
+        
+        engines = [
+            engine for engine in (
+                self._core_engine, self._schema_engine,
+                self._core_replica_engine, self._schema_replica_engine
+            ) if engine is not None
+        ]
+        await asyncio.gather(
+            self._tenant_engines.dispose_all(),
+            self._tenant_replica_engines.dispose_all(),
+            *(engine.dispose() for engine in engines)
+        )
+        self._core_engine = self._core_sessionmaker = None
+        self._schema_engine = self._schema_sessionmaker = None
+        self._core_replica_engine = self._core_replica_sessionmaker = None
+        self._schema_replica_engine = self._schema_replica_sessionmaker = None
+        return drained
+    
+    def engine_cache_stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters of the tenant engine cache"""
+        return self._tenant_engines.stats()
+    
+    def compiled_cache_stats(self) -> Dict[str, int]:
+        """Size and hit counters of the compiled-SQL cache shared by tenant engines"""
+        if self._compiled_cache is None:
+            return {}
+        return self._compiled_cache.stats()
+    
+    def connection_budget_stats(self) -> Dict[str, float]:
+        """Usage and queue wait times of the tenant connection budget"""
+        return self._connection_budget.stats()
+    
+    async def create_tenant_database(self, tenant_slug: str, server: Optional[str] = None) -> bool:
+        """Create a new database (or schema, in schema mode) for a tenant.
+        
+        The database goes on ``server``, or else where the tenant is placed
+        (placing it first if needed). Returns True when the database was
+        cloned from the template and therefore already has its tables.
+        """
+        if self.uses_schemas:
+            await self._create_tenant_schema(tenant_slug)
+            return False
+        
+        if server is None:
+            server = await self.placements.place(tenant_slug)
+        db_name = f"multitenant_{tenant_slug}"
+        template = None
+        if settings.tenant_template_enabled:
+            try:
+                template = await self.ensure_template_database(server)
+            except Exception:
+                # Without a usable template we can still build the schema with create_all
+                template = None
+        
+        conn = await self._connect_admin(server)
+        try:
+            # Create the tenant database
+            if template:
+                await conn.execute(f'CREATE DATABASE "{db_name}" TEMPLATE "{template}"')
+            else:
+                await conn.execute(f'CREATE DATABASE "{db_name}"')
+        except asyncpg.DuplicateDatabaseError:
+            # Database already exists
+            return False
+        finally:
+            await conn.close()
+        return template is not None
+    
+    async def drop_tenant_database(self, tenant_slug: str, server: Optional[str] = None):
+        """Drop a tenant's database (or schema, in schema mode).
+        
+        ``server`` drops the copy on that server rather than on the placed one.
+        """
+        if not self.uses_schemas and server is None:
+            server = await self.placements.locate(tenant_slug)
+        self._tenant_engines.discard(tenant_slug)
+        self._tenant_replica_engines.discard(tenant_slug)
+        db_metrics.forget(tenant_slug)
+        db_metrics.forget(f"{tenant_slug}{REPLICA_LABEL_SUFFIX}")
+        if self.uses_schemas:
+            engine = self._get_schema_engine()
+            quoted = engine.dialect.identifier_preparer.quote_identifier(
+                tenant_schema_name(tenant_slug)
             )
-        return self._sessions[tenant_slug]()
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {quoted} CASCADE"))
+            return
+        
+        conn = await self._connect_admin(server)
+        try:
+            await conn.execute(f'DROP DATABASE IF EXISTS "multitenant_{tenant_slug}"')
+        finally:
+            await conn.close()
     
-    async def create_tenant_database(self, tenant_slug: str):
-        """Create a new database for a tenant"""
-        # Connect to PostgreSQL without specifying a database
-        base_url = settings.database_url.replace('+asyncpg', '').rsplit('/', 1)[0]
+    async def _connect_admin(self, server: str = DEFAULT_SERVER, database: str = "postgres"):
+        # Connect to the server's default postgres database unless told otherwise
+        base_url = self.placements.server_urls()[server].replace('+asyncpg', '')
         
         # Extract connection components
         from urllib.parse import urlparse
         parsed = urlparse(base_url)
         
-        conn = await asyncpg.connect(
+        return await asyncpg.connect(
             host=parsed.hostname,
             port=parsed.port,
             user=parsed.username,
             password=parsed.password,
-            database='postgres'  # Connect to default postgres database
+            database=database
+        )
+    
+    async def ensure_template_database(self, server: str = DEFAULT_SERVER) -> str:
+        """Make sure the server's tenant template database matches the tenant models.
+        
+        The template is rebuilt whenever the fingerprint of the TenantBase
+        DDL, stored as the database comment, differs from the current one.
+        Returns the template database name.
+        """
+        fingerprint = tenant_metadata_fingerprint()
+        if self._template_fingerprints.get(server) == fingerprint:
+            return TEMPLATE_DATABASE
+        
+        async with self._template_lock:
+            if self._template_fingerprints.get(server) == fingerprint:
+                return TEMPLATE_DATABASE
+            
+            conn = await self._connect_admin(server)
+            try:
+                current = await conn.fetchval(
+                    "SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = $1",
+                    TEMPLATE_DATABASE
+                )
+                if current != fingerprint:
+                    await self._rebuild_template(conn, fingerprint, server)
+            finally:
+                await conn.close()
+            
+            self._template_fingerprints[server] = fingerprint
+        return TEMPLATE_DATABASE
+    
+    async def _rebuild_template(self, conn, fingerprint: str, server: str):
+        from app.models.tenant import TenantBase
+        exists = await conn.fetchval(
+            "SELECT 1 FROM pg_database WHERE datname = $1", TEMPLATE_DATABASE
         )
+        if exists:
+            await conn.execute(f'ALTER DATABASE "{TEMPLATE_DATABASE}" WITH IS_TEMPLATE false')
+            await conn.execute(f'DROP DATABASE "{TEMPLATE_DATABASE}"')
+        await conn.execute(f'CREATE DATABASE "{TEMPLATE_DATABASE}"')
         
+        # CREATE DATABASE ... TEMPLATE fails while anyone is connected to the
+        # template, so build it through a throwaway engine without a pool
+        base_url = self.placements.server_urls()[server]
+        engine = create_async_engine(f"{base_url}/{TEMPLATE_DATABASE}", poolclass=NullPool)
         try:
-            # Create the tenant database
-            db_name = f"multitenant_{tenant_slug}"
-            await conn.execute(f'CREATE DATABASE "{db_name}"')
-        except asyncpg.DuplicateDatabaseError:
-            # Database already exists
-            pass
+            async with engine.begin() as template_conn:
+                await template_conn.run_sync(TenantBase.metadata.create_all)
+                await template_conn.run_sync(stamp_head)
         finally:
-            await conn.close()
+            await engine.dispose()
+        
+        await conn.execute(f"COMMENT ON DATABASE \"{TEMPLATE_DATABASE}\" IS '{fingerprint}'")
+        await conn.execute(f'ALTER DATABASE "{TEMPLATE_DATABASE}" WITH IS_TEMPLATE true')
+    
+    async def _create_tenant_schema(self, tenant_slug: str):
+        engine = self._get_schema_engine()
+        quoted = engine.dialect.identifier_preparer.quote_identifier(
+            tenant_schema_name(tenant_slug)
+        )
+        async with engine.begin() as conn:
+            await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {quoted}"))
     
     async def create_tenant_tables(self, tenant_slug: str):
         """Create tables in tenant database"""
         from app.models.tenant import TenantBase
+        schema = tenant_schema_name(tenant_slug) if self.uses_schemas else None
         engine = await self.get_tenant_engine(tenant_slug)
         async with engine.begin() as conn:
+            if schema:
+                # Tenant tables carry no schema, so route them into the tenant's one
+                await conn.execution_options(schema_translate_map={None: schema})
             await conn.run_sync(TenantBase.metadata.create_all)
+            # New tenants start at the latest migration rather than replaying them all
+            await conn.run_sync(partial(stamp_head, schema=schema))
 
 db_manager = DatabaseManager()
\ No newline at end of file
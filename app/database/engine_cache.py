@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Type
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+class CachedEngine:
+    """A tenant engine together with its session factory and usage state"""
+
+    def __init__(
+        self,
+        key: str,
+        engine: AsyncEngine,
+        session_class: Type[AsyncSession],
+        sync_session_class: Type[Session] = Session,
+        tag: Optional[str] = None
+    ):
+        self.key = key
+        self.engine = engine
+        # What the engine was built for, e.g. the server holding the tenant
+        self.tag = tag
+        self.sessionmaker = async_sessionmaker(
+            engine, class_=session_class, sync_session_class=sync_session_class, expire_on_commit=False
+        )
+        self.last_used = time.monotonic()
+        self.checked_out = 0
+        self.evicted = False
+
+class TenantEngineCache:
+    """LRU cache of tenant engines with idle expiry.
+
+    Engines are evicted when the cache grows past ``max_size`` or when they
+    have not been used for ``idle_ttl`` seconds. An evicted engine is only
+    disposed once every connection it handed out has been checked back in,
+    so requests that are still running against it finish normally.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], AsyncEngine],
+        max_size: int,
+        idle_ttl: float,
+        session_class: Type[AsyncSession] = AsyncSession,
+        sync_session_class: Type[Session] = Session
+    ):
+        self._factory = factory
+        self._session_class = session_class
+        self._sync_session_class = sync_session_class
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[str, CachedEngine]" = OrderedDict()
+        self._draining: Set[CachedEngine] = set()
+        self._dispose_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, tag: Optional[str] = None) -> CachedEngine:
+        """Cached engine for ``key``, rebuilt if it was created with another ``tag``"""
+        now = time.monotonic()
+        self._expire_idle(now)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.tag != tag:
+            self.discard(key)
+            entry = None
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self.misses += 1
+            entry = CachedEngine(
+                key, self._factory(key), self._session_class, self._sync_session_class, tag
+            )
+            self._track_checkouts(entry)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                _, oldest = self._entries.popitem(last=False)
+                self._evict(oldest)
+
+        entry.last_used = now
+        return entry
+
+    def discard(self, key: str):
+        """Evict ``key`` now, e.g. because its database is going away"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._evict(entry)
+
+    def recent(self, limit: int) -> List[str]:
+        """Up to ``limit`` cached keys, most recently used first"""
+        return list(reversed(self._entries))[:limit]
+
+    async def dispose_all(self):
+        """Dispose every cached and draining engine concurrently"""
+        entries = list(self._entries.values()) + list(self._draining)
+        self._entries.clear()
+        self._draining.clear()
+        for entry in entries:
+            entry.evicted = True
+        await asyncio.gather(
+            *(entry.engine.dispose() for entry in entries),
+            *self._dispose_tasks,
+            return_exceptions=True
+        )
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "draining": len(self._draining),
+        }
+
+    def _expire_idle(self, now: float):
+        if self.idle_ttl <= 0:
+            return
+        # Entries are kept in least-recently-used order, so idle ones are at the front
+        while self._entries:
+            key, oldest = next(iter(self._entries.items()))
+            if now - oldest.last_used < self.idle_ttl:
+                break
+            del self._entries[key]
+            self._evict(oldest)
+
+    def _evict(self, entry: CachedEngine):
+        self.evictions += 1
+        entry.evicted = True
+        if entry.checked_out == 0:
+            self._schedule_dispose(entry)
+        else:
+            self._draining.add(entry)
+
+    def _track_checkouts(self, entry: CachedEngine):
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            entry.checked_out += 1
+
+        def on_checkin(dbapi_connection, connection_record):
+            entry.checked_out -= 1
+            if entry.evicted and entry.checked_out == 0:
+                # A session created before eviction may still connect afterwards;
+                # disposing again on its checkin keeps that pool from leaking.
+                self._draining.discard(entry)
+                self._schedule_dispose(entry)
+
+        event.listen(entry.engine.sync_engine, "checkout", on_checkout)
+        event.listen(entry.engine.sync_engine, "checkin", on_checkin)
+
+    def _schedule_dispose(self, entry: CachedEngine):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Checkin from garbage collection outside the loop; the pool goes with it
+            return
+        task = loop.create_task(entry.engine.dispose())
+        self._dispose_tasks.add(task)
+        task.add_done_callback(self._dispose_tasks.discard)
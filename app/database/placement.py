@@ -0,0 +1,294 @@
+import asyncio
+import hashlib
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+
+# The server of the core database, which holds every tenant unless told otherwise
+DEFAULT_SERVER = "default"
+
+class PlacementPolicy:
+    """Chooses the server for a new tenant"""
+
+    def choose(self, tenant_slug: str, servers: List[str], tenant_counts: Dict[str, int]) -> str:
+        raise NotImplementedError
+
+class LeastLoadedPolicy(PlacementPolicy):
+    """Place each new tenant on the server holding the fewest tenants"""
+
+    def choose(self, tenant_slug: str, servers: List[str], tenant_counts: Dict[str, int]) -> str:
+        return min(servers, key=lambda server: (tenant_counts.get(server, 0), server))
+
+class ConsistentHashPolicy(PlacementPolicy):
+    """Place tenants on a hash ring, so adding a server only claims ~1/n of new slugs.
+
+    Every server gets ``points`` positions on the ring; a slug belongs to
+    the first server position at or after its own hash.
+    """
+
+    def __init__(self, points: int = 100):
+        self.points = points
+        self._ring: Tuple[List[int], List[str]] = ([], [])
+        self._ring_servers: Tuple[str, ...] = ()
+
+    def choose(self, tenant_slug: str, servers: List[str], tenant_counts: Dict[str, int]) -> str:
+        if tuple(servers) != self._ring_servers:
+            ring = sorted(
+                (_hash(f"{server}#{point}"), server)
+                for server in servers for point in range(self.points)
+            )
+            self._ring = ([position for position, _ in ring], [server for _, server in ring])
+            self._ring_servers = tuple(servers)
+
+        positions, owners = self._ring
+        return owners[bisect_left(positions, _hash(tenant_slug)) % len(owners)]
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+# Policies selectable through settings.tenant_placement_policy
+PLACEMENT_POLICIES: Dict[str, Callable[[], PlacementPolicy]] = {
+    "least_loaded": LeastLoadedPolicy,
+    "consistent_hash": ConsistentHashPolicy,
+}
+
+class TenantPlacements:
+    """Which server holds each tenant database, cached from the core database.
+
+    Placements live in the core ``tenant_placements`` table. Lookups are
+    answered from memory; the map is refreshed incrementally every
+    ``tenant_placement_refresh_seconds``, so a tenant moved by another
+    process is followed within that interval, and reloaded in full every
+    ``tenant_placement_full_reload_seconds``. With no extra servers
+    configured every tenant is on the default server and the core database
+    is never consulted.
+    """
+
+    def __init__(self, session_factory: Callable[[], Awaitable[AsyncSession]]):
+        self._session_factory = session_factory
+        self._servers: Dict[str, str] = {}
+        self._high_water: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._reloaded_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+        self._place_lock = asyncio.Lock()
+        self.policy = PLACEMENT_POLICIES[settings.tenant_placement_policy]()
+        # Called with (slug, old server, new server) when a refresh sees a tenant move
+        self.on_move: Optional[Callable[[str, str, str], None]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.tenant_servers)
+
+    def server_urls(self) -> Dict[str, str]:
+        """Server name -> URL without the database name"""
+        return {DEFAULT_SERVER: settings.database_url.rsplit('/', 1)[0], **settings.tenant_servers}
+
+    def replica_url(self, server: str) -> Optional[str]:
+        if server in settings.tenant_replica_servers:
+            return settings.tenant_replica_servers[server]
+        if server == DEFAULT_SERVER and settings.database_replica_url is not None:
+            return settings.database_replica_url.rsplit('/', 1)[0]
+        return None
+
+    def server_of(self, tenant_slug: str) -> str:
+        """Server of a tenant already looked up with ``locate``"""
+        return self._servers.get(tenant_slug, DEFAULT_SERVER)
+
+    async def locate(self, tenant_slug: str) -> str:
+        if not self.enabled:
+            return DEFAULT_SERVER
+        if self._is_stale():
+            await self.refresh()
+
+        server = self._servers.get(tenant_slug)
+        if server is None:
+            # Placed by another process since the last refresh
+            # Tenants without a row predate the extra servers and are on the default one
+            server = await self._lookup(tenant_slug) or DEFAULT_SERVER
+            self._set(tenant_slug, server)
+        return server
+
+    async def place(self, tenant_slug: str) -> str:
+        """Server for a new tenant: its existing placement, or one chosen by the policy"""
+        if not self.enabled:
+            return DEFAULT_SERVER
+        from app.database.core import insert_ignoring_conflicts
+        from app.models.core import Organization, TenantPlacement
+
+        async with self._place_lock:
+            session = await self._session_factory()
+            try:
+                organization_id = await session.scalar(
+                    select(Organization.id).where(Organization.slug == tenant_slug)
+                )
+                if organization_id is None:
+                    raise ValueError(f"No organization {tenant_slug!r} to place")
+
+                counts = dict((await session.execute(
+                    select(TenantPlacement.server, func.count()).group_by(TenantPlacement.server)
+                )).all())
+                servers = self.open_servers()
+                server = self.policy.choose(tenant_slug, servers, counts)
+                await session.execute(
+                    insert_ignoring_conflicts(session, TenantPlacement, ["organization_id"])
+                    .values(organization_id=organization_id, server=server)
+                )
+                await session.commit()
+                # A retried provisioning step keeps the placement it was given first
+                server = await session.scalar(
+                    select(TenantPlacement.server)
+                    .where(TenantPlacement.organization_id == organization_id)
+                )
+            finally:
+                await session.close()
+
+        self._set(tenant_slug, server)
+        return server
+
+    async def start_move(self, tenant_slug: str, destination: str) -> str:
+        """Mark the tenant as moving to ``destination``; returns its current server"""
+        from app.database.core import insert_ignoring_conflicts
+        from app.models.core import Organization, TenantPlacement
+
+        session = await self._session_factory()
+        try:
+            organization_id = await session.scalar(
+                select(Organization.id).where(Organization.slug == tenant_slug)
+            )
+            if organization_id is None:
+                raise ValueError(f"No organization {tenant_slug!r} to move")
+
+            # Tenants provisioned while only the default server existed have no row yet
+            await session.execute(
+                insert_ignoring_conflicts(session, TenantPlacement, ["organization_id"])
+                .values(organization_id=organization_id, server=DEFAULT_SERVER)
+            )
+            source = await session.scalar(
+                update(TenantPlacement)
+                .where(
+                    TenantPlacement.organization_id == organization_id,
+                    TenantPlacement.moving_to.is_(None)
+                )
+                .values(moving_to=destination)
+                .returning(TenantPlacement.server)
+                .execution_options(synchronize_session=False)
+            )
+            if source is None:
+                raise ValueError(f"Tenant {tenant_slug!r} is already being moved")
+            await session.commit()
+        finally:
+            await session.close()
+        return source
+
+    async def finish_move(self, tenant_slug: str, destination: Optional[str] = None):
+        """Point the tenant at ``destination``, or just clear the move if it is None"""
+        from app.models.core import TenantPlacement
+
+        values = {"moving_to": None}
+        if destination is not None:
+            values["server"] = destination
+        session = await self._session_factory()
+        try:
+            await session.execute(
+                update(TenantPlacement)
+                .where(TenantPlacement.organization_id == _organization_id(tenant_slug))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        finally:
+            await session.close()
+        if destination is not None:
+            self._set(tenant_slug, destination)
+
+    def open_servers(self) -> List[str]:
+        servers = [name for name in self.server_urls() if name not in settings.tenant_servers_closed]
+        if not servers:
+            raise RuntimeError("Every tenant server is closed to new tenants")
+        return servers
+
+    async def refresh(self):
+        """Load placements changed since the previous refresh, or all of them"""
+        from app.models.core import Organization, TenantPlacement
+
+        async with self._refresh_lock:
+            if self._refreshed_at is not None and not self._is_stale():
+                return
+
+            now = time.monotonic()
+            full = (
+                self._reloaded_at is None
+                or now - self._reloaded_at >= settings.tenant_placement_full_reload_seconds
+            )
+
+            query = select(
+                Organization.slug,
+                TenantPlacement.server,
+                TenantPlacement.created_at,
+                TenantPlacement.updated_at
+            ).join(Organization, Organization.id == TenantPlacement.organization_id)
+            if not full and self._high_water is not None:
+                # Stamps are transaction start times, so a placement committed
+                # after the last refresh can be older than the mark
+                since = self._high_water - timedelta(seconds=settings.tenant_placement_refresh_seconds)
+                query = query.where(or_(
+                    TenantPlacement.created_at >= since,
+                    TenantPlacement.updated_at >= since
+                ))
+
+            session = await self._session_factory()
+            try:
+                rows = (await session.execute(query)).all()
+            finally:
+                await session.close()
+
+            if full:
+                # Tenants deleted since, or remembered without a row, are looked up again
+                for slug in self._servers.keys() - {row[0] for row in rows}:
+                    del self._servers[slug]
+                self._reloaded_at = now
+            for slug, server, created_at, updated_at in rows:
+                self._set(slug, server)
+                for seen in (created_at, updated_at):
+                    if seen is not None and (self._high_water is None or seen > self._high_water):
+                        self._high_water = seen
+            self._refreshed_at = now
+
+    def stats(self) -> Dict[str, float]:
+        tenants: Dict[str, int] = {}
+        for server in self._servers.values():
+            tenants[server] = tenants.get(server, 0) + 1
+        return {f"tenants_{server}": count for server, count in sorted(tenants.items())}
+
+    def _set(self, tenant_slug: str, server: str):
+        previous = self._servers.get(tenant_slug)
+        self._servers[tenant_slug] = server
+        if previous is not None and previous != server and self.on_move is not None:
+            self.on_move(tenant_slug, previous, server)
+
+    def _is_stale(self) -> bool:
+        if self._refreshed_at is None:
+            return True
+        return time.monotonic() - self._refreshed_at >= settings.tenant_placement_refresh_seconds
+
+    async def _lookup(self, tenant_slug: str) -> Optional[str]:
+        from app.models.core import Organization, TenantPlacement
+
+        session = await self._session_factory()
+        try:
+            return await session.scalar(
+                select(TenantPlacement.server)
+                .join(Organization, Organization.id == TenantPlacement.organization_id)
+                .where(Organization.slug == tenant_slug)
+            )
+        finally:
+            await session.close()
+
+def _organization_id(tenant_slug: str):
+    from app.models.core import Organization
+    return select(Organization.id).where(Organization.slug == tenant_slug).scalar_subquery()
@@ -0,0 +1,61 @@
+from typing import Any, Dict, Optional
+from weakref import WeakKeyDictionary
+from sqlalchemy.engine import Dialect
+from sqlalchemy.util import LRUCache
+
+class SharedCompiledCache(LRUCache):
+    """Compiled-SQL cache shared by engines whose dialects compile alike.
+
+    SQLAlchemy keys compiled statements on the dialect instance, and every
+    engine has its own, so even a cache handed to several engines through
+    the ``compiled_cache`` execution option would only ever hit for the
+    engine that filled it. Tenant databases share one schema, so the
+    dialect in the key is replaced by the settings that affect the SQL it
+    renders, and a statement compiled for one tenant is reused by all.
+    Each compiled entry still references the dialect that compiled it, so
+    that engine's dialect (not its pool) stays alive until its entries are
+    evicted.
+    """
+
+    __slots__ = ("hits", "misses", "_signatures")
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.hits = 0
+        self.misses = 0
+        # Weak, so the signature memo alone keeps no disposed engine's dialect alive
+        self._signatures: "WeakKeyDictionary[Dialect, tuple]" = WeakKeyDictionary()
+
+    def _signature(self, dialect: Dialect) -> tuple:
+        signature = self._signatures.get(dialect)
+        if signature is not None:
+            return signature
+        signature = (
+            type(dialect),
+            dialect.server_version_info,
+            dialect.paramstyle,
+            dialect.label_length,
+            dialect.max_identifier_length,
+            dialect.default_schema_name,
+        )
+        # Server version and default schema are only known once the engine has connected
+        if dialect.server_version_info is not None:
+            self._signatures[dialect] = signature
+        return signature
+
+    def _normalize(self, key: tuple) -> tuple:
+        return (self._signature(key[0]),) + key[1:]
+
+    def get(self, key: tuple, default: Optional[Any] = None) -> Optional[Any]:
+        compiled = super().get(self._normalize(key), default)
+        if compiled is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return compiled
+
+    def __setitem__(self, key: tuple, value: Any):
+        super().__setitem__(self._normalize(key), value)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,155 @@
+"""Versioned schema migrations for tenant databases.
+
+Tenant migrations live in ``alembic_tenants/`` and are applied to every
+tenant by this runner::
+
+    python -m app.database.tenant_migrations --workers 16
+
+Alembic keeps its migration context in module globals, so tenants are
+migrated in parallel worker processes rather than in one event loop. The
+revision reached by each tenant is recorded in a JSON state file as it
+completes; a rerun skips tenants already at head, so an interrupted run
+picks up where it stopped. A single tenant can also be migrated with
+``alembic --name tenants -x tenant=<slug> upgrade head``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from app.config import settings
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+def tenant_alembic_config() -> Config:
+    return Config(str(ALEMBIC_INI), ini_section="tenants")
+
+def tenant_head_revision() -> str:
+    return ScriptDirectory.from_config(tenant_alembic_config()).get_current_head()
+
+def stamp_head(connection, schema: Optional[str] = None):
+    """Mark a freshly built tenant schema as being at the latest revision"""
+    context = MigrationContext.configure(
+        connection, opts={"version_table_schema": schema}
+    )
+    context.stamp(ScriptDirectory.from_config(tenant_alembic_config()), "head")
+
+async def list_tenants() -> List[Tuple[str, str]]:
+    """(slug, server) of every tenant database (or schema, in schema mode)"""
+    from app.database.core import db_manager, TEMPLATE_DATABASE
+    from app.database.placement import DEFAULT_SERVER
+    if db_manager.uses_schemas:
+        engine = db_manager._get_schema_engine()
+        async with engine.connect() as conn:
+            result = await conn.execute(text(
+                "SELECT schema_name FROM information_schema.schemata "
+                "WHERE schema_name LIKE 'tenant\\_%' ORDER BY schema_name"
+            ))
+            return [(name[len("tenant_"):], DEFAULT_SERVER) for name in result.scalars()]
+
+    placements = db_manager.placements
+    if placements.enabled:
+        await placements.refresh()
+    tenants = []
+    for server in placements.server_urls():
+        conn = await db_manager._connect_admin(server)
+        try:
+            rows = await conn.fetch(
+                "SELECT datname FROM pg_database "
+                "WHERE datname LIKE 'multitenant\\_%' AND datname <> $1 ORDER BY datname",
+                TEMPLATE_DATABASE
+            )
+        finally:
+            await conn.close()
+        for row in rows:
+            slug = row["datname"][len("multitenant_"):]
+            # Mid-move a tenant has a copy on two servers; only the placed one is live
+            if placements.server_of(slug) == server:
+                tenants.append((slug, server))
+    return tenants
+
+def migrate_tenant(
+    tenant_slug: str, revision: str = "head", server: Optional[str] = None
+) -> Tuple[str, float]:
+    """Upgrade one tenant; runs inside a worker process"""
+    started = time.perf_counter()
+    config = tenant_alembic_config()
+    config.attributes["tenant_slug"] = tenant_slug
+    config.attributes["tenant_server"] = server
+    command.upgrade(config, revision)
+    return tenant_slug, time.perf_counter() - started
+
+class MigrationState:
+    """Per-tenant revision state persisted between runs"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tenants: Dict[str, Dict[str, object]] = {}
+        if path.exists():
+            self.tenants = json.loads(path.read_text())["tenants"]
+
+    def revision(self, tenant_slug: str) -> Optional[str]:
+        return self.tenants.get(tenant_slug, {}).get("revision")
+
+    def record(self, tenant_slug: str, revision: Optional[str], error: Optional[str] = None):
+        entry = {"revision": revision, "updated_at": time.time()}
+        if error:
+            entry["error"] = error
+        self.tenants[tenant_slug] = entry
+
+    def save(self):
+        # Write then rename, so a crash never leaves a truncated state file
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"tenants": self.tenants}, indent=1))
+        os.replace(tmp, self.path)
+
+def run(workers: int, state_path: Path, progress_every: int = 50) -> int:
+    head = tenant_head_revision()
+    state = MigrationState(state_path)
+    tenants = asyncio.run(list_tenants())
+    todo = [(slug, server) for slug, server in tenants if state.revision(slug) != head]
+    print(f"{len(tenants)} tenants, {len(tenants) - len(todo)} already at {head}, {len(todo)} to migrate")
+
+    started = time.perf_counter()
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(migrate_tenant, slug, "head", server): slug for slug, server in todo}
+        for future in as_completed(futures):
+            slug = futures[future]
+            try:
+                future.result()
+                state.record(slug, head)
+            except Exception as e:
+                failed += 1
+                state.record(slug, state.revision(slug), error=f"{type(e).__name__}: {e}")
+            done += 1
+            state.save()
+
+            if done % progress_every == 0 or done == len(todo):
+                elapsed = time.perf_counter() - started
+                rate = done / elapsed if elapsed else 0.0
+                eta = (len(todo) - done) / rate if rate else 0.0
+                print(
+                    f"{done}/{len(todo)} migrated, {failed} failed, "
+                    f"{rate:.1f} tenants/s, eta {eta:.0f}s"
+                )
+    return 1 if failed else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate every tenant database to the latest revision")
+    parser.add_argument("--workers", type=int, default=settings.tenant_migration_workers)
+    parser.add_argument("--state-file", type=Path, default=Path(settings.tenant_migration_state_file))
+    parser.add_argument("--progress-every", type=int, default=50)
+    args = parser.parse_args()
+    raise SystemExit(run(args.workers, args.state_file, args.progress_every))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Online moves of tenant databases between PostgreSQL servers.
+
+A tenant keeps serving from its current (source) server while its data is
+copied to the destination with PostgreSQL logical replication::
+
+    python -m app.database.tenant_moves <slug> <server> [--drop-source]
+
+1. The destination database is created from the template, and its tables
+   subscribe to a publication of every table in the source database.
+2. Once the initial copy has finished, the source database is made
+   read-only and its client connections are terminated. Writes to the
+   tenant fail from here until the switch; reads keep working.
+3. When the destination has caught up with the source's WAL, sequences are
+   advanced (logical replication does not carry them), the placement is
+   switched and the replication is torn down.
+4. Other processes follow the new placement within
+   ``tenant_placement_refresh_seconds``. With ``--drop-source`` the source
+   database is dropped after that interval; otherwise it is left read-only.
+
+The source server needs ``wal_level = logical``, and the destination must
+reach it at the host in its ``tenant_servers`` URL. A failed move is rolled
+back: the source is made writable again and the partial copy is dropped.
+"""
+import argparse
+import asyncio
+import time
+from contextlib import suppress
+from typing import Dict
+from urllib.parse import urlparse
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from app.config import settings
+from app.database.core import db_manager
+from app.database.tenant_migrations import stamp_head
+
+async def move_tenant(
+    tenant_slug: str,
+    destination: str,
+    drop_source: bool = False,
+    catch_up_timeout: float = 60.0,
+    poll_interval: float = 0.5
+) -> Dict[str, float]:
+    """Move a tenant's database to ``destination``; returns the phase timings"""
+    if db_manager.uses_schemas:
+        raise ValueError("Tenants can only be moved between servers with database isolation")
+    placements = db_manager.placements
+    if destination not in placements.server_urls():
+        raise ValueError(f"Unknown server {destination!r}")
+
+    source = await placements.start_move(tenant_slug, destination)
+    if source == destination:
+        await placements.finish_move(tenant_slug)
+        raise ValueError(f"Tenant {tenant_slug!r} is already on {destination!r}")
+
+    database = f"multitenant_{tenant_slug}"
+    # Slugs may contain "-", which replication object names may not
+    name = f"move_{tenant_slug.replace('-', '_')}"
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    try:
+        await _create_destination(tenant_slug, destination)
+        await _execute(source, database, f'CREATE PUBLICATION "{name}" FOR ALL TABLES')
+        await _execute(
+            destination, database,
+            f"CREATE SUBSCRIPTION \"{name}\" CONNECTION '{_dsn(source, database)}' PUBLICATION \"{name}\""
+        )
+        await _wait_for_initial_copy(destination, database, name, poll_interval)
+        timings["copy_seconds"] = time.perf_counter() - started
+
+        fenced = time.perf_counter()
+        await _set_read_only(source, database, True)
+        await _wait_for_catch_up(source, destination, database, name, catch_up_timeout, poll_interval)
+        await _copy_sequences(source, destination, database)
+        await placements.finish_move(tenant_slug, destination)
+        timings["read_only_seconds"] = time.perf_counter() - fenced
+    except BaseException:
+        await _abort(tenant_slug, source, destination, database, name)
+        raise
+
+    # The source stays read-only, so nothing written there after the switch is lost
+    await _execute(destination, database, f'DROP SUBSCRIPTION "{name}"')
+    await _execute(source, database, f'DROP PUBLICATION "{name}"')
+
+    if drop_source:
+        # Give other processes time to stop routing to the source
+        await asyncio.sleep(settings.tenant_placement_refresh_seconds)
+        await _drop_database(source, database)
+    timings["total_seconds"] = time.perf_counter() - started
+    return timings
+
+async def _execute(server: str, database: str, statement: str, *args):
+    conn = await db_manager._connect_admin(server, database)
+    try:
+        return await conn.fetch(statement, *args)
+    finally:
+        await conn.close()
+
+def _dsn(server: str, database: str) -> str:
+    """libpq connection string the destination uses to subscribe to ``server``"""
+    parsed = urlparse(db_manager.placements.server_urls()[server].replace('+asyncpg', ''))
+    parts = {
+        "host": parsed.hostname,
+        "port": parsed.port,
+        "user": parsed.username,
+        "password": parsed.password,
+        "dbname": database,
+    }
+    return " ".join(
+        f"{key}={value}" for key, value in parts.items() if value is not None
+    ).replace("'", "''")
+
+async def _create_destination(tenant_slug: str, destination: str):
+    await db_manager.create_tenant_database(tenant_slug, server=destination)
+    engine = create_async_engine(db_manager.tenant_database_url(tenant_slug, destination), poolclass=NullPool)
+    try:
+        async with engine.begin() as conn:
+            from app.models.tenant import TenantBase
+            await conn.run_sync(TenantBase.metadata.create_all)
+            # The migration version arrives with the data, like every other row
+            await conn.run_sync(stamp_head)
+            await conn.exec_driver_sql("DELETE FROM alembic_version")
+    finally:
+        await engine.dispose()
+
+async def _wait_for_initial_copy(destination: str, database: str, name: str, poll_interval: float):
+    while True:
+        rows = await _execute(
+            destination, database,
+            "SELECT count(*) AS copying FROM pg_subscription_rel r "
+            "JOIN pg_subscription s ON s.oid = r.srsubid "
+            "WHERE s.subname = $1 AND r.srsubstate NOT IN ('r', 's')",
+            name
+        )
+        if rows[0]["copying"] == 0:
+            return
+        await asyncio.sleep(poll_interval)
+
+async def _set_read_only(server: str, database: str, read_only: bool):
+    if read_only:
+        await _execute(server, "postgres", f'ALTER DATABASE "{database}" SET default_transaction_read_only = on')
+        # Pooled connections opened before the change could still write
+        await _execute(
+            server, "postgres",
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = $1 AND pid <> pg_backend_pid() AND backend_type = 'client backend'",
+            database
+        )
+    else:
+        await _execute(server, "postgres", f'ALTER DATABASE "{database}" RESET default_transaction_read_only')
+
+async def _wait_for_catch_up(
+    source: str, destination: str, database: str, name: str, timeout: float, poll_interval: float
+):
+    target = (await _execute(source, database, "SELECT pg_current_wal_lsn()::text AS lsn"))[0]["lsn"]
+    deadline = time.monotonic() + timeout
+    while True:
+        rows = await _execute(
+            destination, database,
+            "SELECT latest_end_lsn >= $2::pg_lsn AS caught_up FROM pg_stat_subscription WHERE subname = $1",
+            name, target
+        )
+        if rows and rows[0]["caught_up"]:
+            return
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Destination did not catch up with the source within {timeout:.0f}s")
+        await asyncio.sleep(poll_interval)
+
+async def _copy_sequences(source: str, destination: str, database: str):
+    sequences = await _execute(
+        source, database,
+        "SELECT schemaname, sequencename, last_value FROM pg_sequences WHERE last_value IS NOT NULL"
+    )
+    for row in sequences:
+        await _execute(
+            destination, database,
+            "SELECT setval(format('%I.%I', $1::text, $2::text), $3)",
+            row["schemaname"], row["sequencename"], row["last_value"]
+        )
+
+async def _drop_database(server: str, database: str):
+    await _execute(
+        server, "postgres",
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = $1 AND pid <> pg_backend_pid()",
+        database
+    )
+    await _execute(server, "postgres", f'DROP DATABASE IF EXISTS "{database}"')
+
+async def _abort(tenant_slug: str, source: str, destination: str, database: str, name: str):
+    # Best effort: undo whatever steps completed, then release the move
+    with suppress(Exception):
+        await _execute(destination, database, f'DROP SUBSCRIPTION IF EXISTS "{name}"')
+    with suppress(Exception):
+        await _execute(source, database, f'DROP PUBLICATION IF EXISTS "{name}"')
+    with suppress(Exception):
+        await _set_read_only(source, database, False)
+    with suppress(Exception):
+        await _drop_database(destination, database)
+    await db_manager.placements.finish_move(tenant_slug)
+
+def main():
+    parser = argparse.ArgumentParser(description="Move a tenant database to another server while it stays online")
+    parser.add_argument("tenant")
+    parser.add_argument("server")
+    parser.add_argument("--drop-source", action="store_true", help="drop the old copy once others have switched")
+    parser.add_argument("--catch-up-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    timings = asyncio.run(
+        move_tenant(args.tenant, args.server, args.drop_source, args.catch_up_timeout)
+    )
+    print(", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in timings.items()))
+
+if __name__ == "__main__":
+    main()
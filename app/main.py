@@ -1,11 +1,32 @@
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, organizations, users
+from app.api import auth, metrics, organizations, users
+from app.config import settings
+from app.core.profiling import ProfilingMiddleware, TimedJSONResponse
+from app.database.core import db_manager
+from app.services.provisioning import provisioning_pipeline
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open pools up front so the first requests do not pay for connection setup
+    await db_manager.startup()
+    # Pick up tenants whose provisioning was cut short by the last shutdown
+    await provisioning_pipeline.resume()
+    yield
+    # The server has stopped taking requests; let background work and open
+    # sessions finish within one shared deadline, then close every pool
+    deadline = time.monotonic() + settings.shutdown_drain_timeout_seconds
+    await provisioning_pipeline.shutdown(settings.shutdown_drain_timeout_seconds)
+    await db_manager.shutdown(max(deadline - time.monotonic(), 0))
 
 app = FastAPI(
     title="Multi-Tenant API",
     description="A multi-tenant application with dynamic database routing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
 
 # CORS middleware
@@ -17,10 +38,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing breakdown and sampled profiling of slow requests
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(organizations.router, prefix="/api/organizations", tags=["Organizations"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
+app.include_router(metrics.router, tags=["Monitoring"])
 
 @app.get("/")
 async def root():
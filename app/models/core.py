@@ -26,8 +26,23 @@ class Organization(Base):
     slug = Column(String, unique=True, index=True, nullable=False)
     description = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    # Tenant provisioning progress: "provisioning", "ready" or "failed"
+    provisioning_status = Column(String, nullable=False, default="provisioning", server_default="ready")
+    provisioning_step = Column(String, nullable=True)
+    provisioning_error = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     owner_id = Column(Integer, ForeignKey("core_users.id"), nullable=False)
     # Relationship to owner
     owner = relationship("CoreUser", back_populates="owned_organizations")
+
+class TenantPlacement(Base):
+    __tablename__ = "tenant_placements"
+    
+    organization_id = Column(Integer, ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    # Name of the server holding the tenant database (see settings.tenant_servers)
+    server = Column(String, nullable=False, index=True)
+    # Destination while the tenant is being moved to another server
+    moving_to = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
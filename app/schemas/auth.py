@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+from app.core.serialization import JSONSerializer
 
 class UserRegister(BaseModel):
     email: EmailStr
@@ -25,16 +26,50 @@ class TenantUserResponse(UserResponse):
     bio: Optional[str] = None
     phone: Optional[str] = None
 
+class TenantUserPage(BaseModel):
+    items: List[TenantUserResponse]
+    next_cursor: Optional[int] = None
+
 class TenantUserUpdate(BaseModel):
     full_name: Optional[str] = None
     bio: Optional[str] = None
     phone: Optional[str] = None
 
+class TenantUserImport(BaseModel):
+    email: EmailStr
+    password: str
+    full_name: Optional[str] = None
+    bio: Optional[str] = None
+    phone: Optional[str] = None
+
+class BulkImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class BulkImportResult(BaseModel):
+    imported: int
+    duplicates: int
+    invalid: int
+    errors: List[BulkImportError]
+    errors_truncated: bool = False
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     user_id: Optional[int] = None
     context: Optional[str] = None
-    tenant: Optional[str] = None
\ No newline at end of file
+    tenant: Optional[str] = None
+
+# Single-pass JSON serializers for the response schemas above
+user_json = JSONSerializer(UserResponse)
+tenant_user_json = JSONSerializer(TenantUserResponse)
+tenant_user_page_json = JSONSerializer(TenantUserPage, items=tenant_user_json)
+bulk_import_result_json = JSONSerializer(BulkImportResult, errors=JSONSerializer(BulkImportError))
+token_json = JSONSerializer(Token)
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from app.core.serialization import JSONSerializer
 
 class OrganizationCreate(BaseModel):
     name: str
@@ -14,7 +15,18 @@ class OrganizationResponse(BaseModel):
     description: Optional[str] = None
     owner_id: int
     is_active: bool
+    provisioning_status: str
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProvisioningStatusResponse(BaseModel):
+    slug: str
+    status: str
+    step: Optional[str] = None
+    error: Optional[str] = None
+
+# Single-pass JSON serializers for the response schemas above
+organization_json = JSONSerializer(OrganizationResponse)
+provisioning_status_json = JSONSerializer(ProvisioningStatusResponse)
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database.core import db_manager
+from app.models.tenant import TenantUser
+from app.services.tenant_directory import tenant_directory
+
+class TenantResult:
+    """Outcome of running a fan-out query against one tenant"""
+
+    def __init__(self, tenant: str, value: Any = None, error: Optional[str] = None, elapsed: float = 0.0):
+        self.tenant = tenant
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+async def fan_out(
+    query: Callable[[AsyncSession], Awaitable[Any]],
+    tenants: Optional[Iterable[str]] = None,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    session_factory: Callable[[str], Awaitable[AsyncSession]] = db_manager.get_tenant_session
+) -> AsyncIterator[TenantResult]:
+    """Run ``query`` against many tenants concurrently.
+
+    ``tenants`` defaults to every active tenant in the directory. At most
+    ``concurrency`` tenants are queried at once, each bounded by
+    ``timeout`` seconds. Results are yielded as they complete; a tenant
+    that fails or times out yields a result carrying the error instead of
+    aborting the run. Closing the iterator early cancels outstanding work.
+    """
+    if tenants is None:
+        await tenant_directory.refresh()
+        tenants = tenant_directory.active_slugs()
+    slugs = list(tenants)
+    concurrency = concurrency or settings.fanout_concurrency
+    timeout = timeout or settings.fanout_timeout_seconds
+
+    async def run_one(slug: str) -> TenantResult:
+        started = time.perf_counter()
+
+        async def run():
+            session = await session_factory(slug)
+            try:
+                return await query(session)
+            finally:
+                await session.close()
+
+        try:
+            value = await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            return TenantResult(slug, error=f"timed out after {timeout}s", elapsed=time.perf_counter() - started)
+        except Exception as e:
+            return TenantResult(slug, error=f"{type(e).__name__}: {e}", elapsed=time.perf_counter() - started)
+        return TenantResult(slug, value=value, elapsed=time.perf_counter() - started)
+
+    pending = iter(slugs)
+    results: "asyncio.Queue[TenantResult]" = asyncio.Queue()
+
+    async def worker():
+        # Workers share one iterator, so each tenant is taken exactly once
+        for slug in pending:
+            results.put_nowait(await run_one(slug))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(slugs)))]
+    try:
+        for _ in range(len(slugs)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+async def active_user_count(session: AsyncSession) -> int:
+    result = await session.execute(
+        select(func.count()).select_from(TenantUser).where(TenantUser.is_active.is_(True))
+    )
+    return result.scalar_one()
+
+async def signups_per_day(session: AsyncSession) -> dict:
+    day = func.date(TenantUser.created_at)
+    result = await session.execute(
+        select(day, func.count()).group_by(day).order_by(day)
+    )
+    return {str(signup_day): count for signup_day, count in result.all()}
@@ -1,10 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from app.models.core import Organization, CoreUser
 from app.models.tenant import TenantUser
 from app.schemas.organization import OrganizationCreate
-from app.database.core import db_manager
-from app.core.security import get_password_hash
+from app.database.core import db_manager, insert_ignoring_conflicts
+from app.core.cache import user_cache, user_cache_key
+from app.services.provisioning import FAILED, PROVISIONING, provisioning_pipeline
+from typing import Optional
 import re
 
 class OrganizationService:
@@ -23,53 +25,71 @@ class OrganizationService:
         if not OrganizationService.validate_slug(org_data.slug):
             raise ValueError("Invalid slug format")
         
-        # Check if organization with slug already exists
-        result = await db.execute(select(Organization).where(Organization.slug == org_data.slug))
-        if result.scalar_one_or_none():
-            raise ValueError("Organization slug already exists")
-        
-        # Create organization
-        db_org = Organization(
+        # The unique slug index settles races; no row back means the slug is taken
+        statement = insert_ignoring_conflicts(db, Organization, ["slug"]).values(
             name=org_data.name,
             slug=org_data.slug,
             description=org_data.description,
             owner_id=owner.id
-        )
+        ).returning(Organization)
         
-        db.add(db_org)
+        db_org = (await db.scalars(statement)).one_or_none()
+        if db_org is None:
+            # Nothing was written; closing the session ends the transaction
+            raise ValueError("Organization slug already exists")
         await db.commit()
-        await db.refresh(db_org)
         
-        # Create tenant database and tables
-        await db_manager.create_tenant_database(org_data.slug)
-        await db_manager.create_tenant_tables(org_data.slug)
+        # Create the tenant database, its tables and the owner account in the
+        # background; the organization stays "provisioning" until they are done
+        provisioning_pipeline.submit(db_org.slug, owner)
         
-        # Sync owner to tenant database
-        await OrganizationService.sync_owner_to_tenant(org_data.slug, owner)
+        return db_org
+    
+    @staticmethod
+    async def retry_provisioning(db: AsyncSession, slug: str, owner: CoreUser) -> Organization:
+        """Provision an organization whose provisioning failed again"""
+        # Only one request can move the row out of "failed", so the job is submitted once
+        statement = (
+            update(Organization)
+            .where(
+                Organization.slug == slug,
+                Organization.owner_id == owner.id,
+                Organization.provisioning_status == FAILED
+            )
+            .values(provisioning_status=PROVISIONING, provisioning_step=None, provisioning_error=None)
+            .returning(Organization)
+            # The row may already be loaded in the session; refresh it from RETURNING
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        db_org = (await db.scalars(statement)).one_or_none()
+        if db_org is None:
+            raise ValueError("Only failed provisioning can be retried")
+        await db.commit()
         
+        provisioning_pipeline.submit(db_org.slug, owner)
         return db_org
     
+    @staticmethod
+    async def get_organization(db: AsyncSession, slug: str) -> Optional[Organization]:
+        result = await db.execute(select(Organization).where(Organization.slug == slug))
+        return result.scalar_one_or_none()
+    
     @staticmethod
     async def sync_owner_to_tenant(tenant_slug: str, owner: CoreUser):
         """Sync organization owner to tenant database"""
         tenant_db = await db_manager.get_tenant_session(tenant_slug)
         
         try:
-            # Check if owner already exists in tenant database
-            result = await tenant_db.execute(
-                select(TenantUser).where(TenantUser.email == owner.email)
-            )
-            existing_user = result.scalar_one_or_none()
+            # An owner already in the tenant database (e.g. a retried step) is left as is
+            statement = insert_ignoring_conflicts(tenant_db, TenantUser, ["email"]).values(
+                email=owner.email,
+                hashed_password=owner.hashed_password,
+                full_name=owner.full_name
+            ).returning(TenantUser.id)
             
-            if not existing_user:
-                # Create owner in tenant database
-                tenant_user = TenantUser(
-                    email=owner.email,
-                    hashed_password=owner.hashed_password,
-                    full_name=owner.full_name
-                )
-                
-                tenant_db.add(tenant_user)
-                await tenant_db.commit()
+            user_id = (await tenant_db.execute(statement)).scalar_one_or_none()
+            await tenant_db.commit()
+            if user_id is not None:
+                user_cache.invalidate(user_cache_key("tenant", tenant_slug, user_id))
         finally:
             await tenant_db.close()
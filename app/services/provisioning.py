@@ -0,0 +1,209 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database.core import db_manager
+from app.models.core import CoreUser, Organization
+from app.services.tenant_directory import tenant_directory
+
+PROVISIONING = "provisioning"
+READY = "ready"
+FAILED = "failed"
+
+class ProvisioningJob:
+    """Progress of one tenant's provisioning run in this process"""
+
+    def __init__(self, slug: str, owner: CoreUser):
+        self.slug = slug
+        self.owner = owner
+        self.status = PROVISIONING
+        self.step: Optional[str] = None
+        self.completed_steps: List[str] = []
+        self.attempts = 0
+        self.cloned_from_template = False
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+class ProvisioningPipeline:
+    """Background provisioning of tenant databases.
+
+    Organizations are committed in a "provisioning" state and handed to the
+    pipeline, which creates the tenant database, its tables and the owner
+    account outside the request. At most ``max_concurrency`` tenants are
+    provisioned at once. Every step is idempotent, so a failed step is
+    simply retried with exponential backoff. Progress is written to the
+    organization row, where the status endpoint reads it. Organizations a
+    stopped process left in "provisioning" are resubmitted by ``resume`` on
+    startup; failed ones are provisioned again on their owner's request.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Awaitable[AsyncSession]],
+        max_concurrency: int,
+        max_attempts: int,
+        retry_backoff: float
+    ):
+        self._session_factory = session_factory
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Jobs still running in this process; finished ones only update counters
+        self._jobs: Dict[str, ProvisioningJob] = {}
+        self.completed = 0
+        self.failed = 0
+        self.steps: List[Tuple[str, Callable[[ProvisioningJob], Awaitable[None]]]] = [
+            ("create_database", self._create_database),
+            ("create_tables", self._create_tables),
+            ("sync_owner", self._sync_owner),
+        ]
+
+    def submit(self, slug: str, owner: CoreUser) -> ProvisioningJob:
+        """Start provisioning ``slug`` in the background"""
+        job = ProvisioningJob(slug, owner)
+        self._jobs[slug] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    async def resume(self) -> int:
+        """Resubmit organizations left in "provisioning"; returns how many.
+        
+        Another running process may still be provisioning some of them, in
+        which case both runs repeat the same idempotent steps.
+        """
+        session = await self._session_factory()
+        try:
+            stuck = (await session.execute(
+                select(Organization.slug, CoreUser)
+                .join(CoreUser, CoreUser.id == Organization.owner_id)
+                .where(Organization.provisioning_status == PROVISIONING)
+            )).all()
+        finally:
+            await session.close()
+        
+        resumed = 0
+        for slug, owner in stuck:
+            if slug not in self._jobs:
+                self.submit(slug, owner)
+                resumed += 1
+        return resumed
+
+    def get_job(self, slug: str) -> Optional[ProvisioningJob]:
+        return self._jobs.get(slug)
+
+    async def wait(self, slug: str):
+        """Wait for the in-process job for ``slug`` to finish, if there is one"""
+        job = self._jobs.get(slug)
+        if job is not None:
+            await asyncio.shield(job.task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": len(self._jobs),
+            "waiting": sum(1 for job in self._jobs.values() if job.step is None),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    async def shutdown(self, timeout: float):
+        """Wait up to ``timeout`` seconds for running jobs, then cancel the rest.
+        
+        Cancelled organizations stay in the "provisioning" state and are
+        resubmitted by ``resume`` when the next process starts.
+        """
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self, job: ProvisioningJob):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        try:
+            async with self._semaphore:
+                await self._run_steps(job)
+        except Exception as e:
+            # Losing the core database mid-run leaves the row in "provisioning"
+            job.status = FAILED
+            job.error = f"{job.step}: {e}"
+        finally:
+            job.finished_at = time.time()
+            # A retry may already have replaced this job with a newer one
+            if self._jobs.get(job.slug) is job:
+                del self._jobs[job.slug]
+            if job.status == READY:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    async def _run_steps(self, job: ProvisioningJob):
+        for name, step in self.steps:
+            job.step = name
+            await self._save(job)
+            if not await self._run_step(job, step):
+                job.status = FAILED
+                await self._save(job)
+                return
+            job.completed_steps.append(name)
+
+        job.status = READY
+        job.step = None
+        job.error = None
+        await self._save(job)
+        tenant_directory.register(job.slug)
+
+    async def _run_step(self, job: ProvisioningJob, step) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            job.attempts += 1
+            try:
+                await step(job)
+                return True
+            except Exception as e:
+                job.error = f"{job.step}: {e}"
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+        return False
+
+    async def _save(self, job: ProvisioningJob):
+        session = await self._session_factory()
+        try:
+            await session.execute(
+                update(Organization)
+                .where(Organization.slug == job.slug)
+                .values(
+                    provisioning_status=job.status,
+                    provisioning_step=job.step,
+                    provisioning_error=job.error
+                )
+            )
+            await session.commit()
+        finally:
+            await session.close()
+
+    async def _create_database(self, job: ProvisioningJob):
+        job.cloned_from_template = await db_manager.create_tenant_database(job.slug)
+
+    async def _create_tables(self, job: ProvisioningJob):
+        if job.cloned_from_template:
+            return
+        await db_manager.create_tenant_tables(job.slug)
+
+    async def _sync_owner(self, job: ProvisioningJob):
+        from app.services.organization_service import OrganizationService
+        await OrganizationService.sync_owner_to_tenant(job.slug, job.owner)
+
+provisioning_pipeline = ProvisioningPipeline(
+    db_manager.get_core_session,
+    max_concurrency=settings.provisioning_concurrency,
+    max_attempts=settings.provisioning_max_attempts,
+    retry_backoff=settings.provisioning_retry_backoff_seconds
+)
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.cache import TTLCache
+from app.database.core import db_manager
+from app.models.core import Organization
+
+class TenantDirectory:
+    """In-memory view of the organizations that requests may be routed to.
+
+    The directory is loaded from the core ``organizations`` table and kept
+    current by periodic incremental refreshes, a less frequent full reload
+    and explicit registration when an organization is created. Slugs that
+    match no organization are looked up on ``lookup_session_factory`` (the
+    primary, so replication lag cannot hide a new tenant) and then
+    remembered in a short-lived negative cache, so repeated garbage
+    ``X-TENANT`` values cost at most one indexed lookup per TTL.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Awaitable[AsyncSession]],
+        lookup_session_factory: Optional[Callable[[], Awaitable[AsyncSession]]] = None
+    ):
+        self._session_factory = session_factory
+        self._lookup_session_factory = lookup_session_factory or session_factory
+        self._active: Dict[str, bool] = {}
+        self._high_water: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._reloaded_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+        self._unknown = TTLCache(
+            max_size=settings.tenant_negative_cache_size,
+            ttl=settings.tenant_negative_cache_ttl_seconds
+        )
+
+    async def is_active(self, slug: str) -> bool:
+        """Whether ``slug`` names an existing, active and provisioned organization"""
+        if self._is_stale():
+            await self.refresh()
+
+        active = self._active.get(slug)
+        if active is not None:
+            return active
+        if self._unknown.get(slug):
+            return False
+
+        # The organization may have been created by another worker since the
+        # last refresh, so confirm with a point lookup before rejecting it
+        active = await self._lookup(slug)
+        if active is None:
+            self._unknown.set(slug, True)
+            return False
+        if active:
+            # Not cached otherwise: a tenant still provisioning may be ready on
+            # the next request, in a worker that did not run its pipeline
+            self._active[slug] = active
+        return active
+
+    def register(self, slug: str, is_active: bool = True):
+        """Record an organization created or changed in this process"""
+        self._active[slug] = is_active
+        self._unknown.invalidate(slug)
+
+    def active_slugs(self):
+        return [slug for slug, active in self._active.items() if active]
+
+    async def refresh(self):
+        """Load organizations changed since the previous refresh, or all of them"""
+        async with self._refresh_lock:
+            if self._refreshed_at is not None and not self._is_stale():
+                return
+
+            now = time.monotonic()
+            full = (
+                self._reloaded_at is None
+                or now - self._reloaded_at >= settings.tenant_directory_full_reload_seconds
+            )
+            query = select(
+                Organization.slug,
+                Organization.is_active,
+                Organization.provisioning_status,
+                Organization.created_at,
+                Organization.updated_at
+            )
+            if not full and self._high_water is not None:
+                # Rows are stamped with their transaction's start time, so one
+                # committed after the last refresh can be older than the mark;
+                # re-read one interval back and leave the rest to the full reload
+                since = self._high_water - timedelta(seconds=settings.tenant_directory_refresh_seconds)
+                query = query.where(or_(
+                    Organization.created_at >= since,
+                    Organization.updated_at >= since
+                ))
+
+            session = await self._session_factory()
+            try:
+                result = await session.execute(query)
+                rows = result.all()
+            finally:
+                await session.close()
+
+            if full:
+                # Also forgets organizations deleted since the last full reload
+                self._active.clear()
+                self._reloaded_at = now
+            for slug, is_active, status, created_at, updated_at in rows:
+                self.register(slug, _is_routable(is_active, status))
+                for seen in (created_at, updated_at):
+                    if seen is not None and (self._high_water is None or seen > self._high_water):
+                        self._high_water = seen
+            self._refreshed_at = now
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "tenants": len(self._active),
+            "active": len(self.active_slugs()),
+            "negative_cache": len(self._unknown),
+            "negative_hits": self._unknown.hits,
+        }
+
+    def _is_stale(self) -> bool:
+        if self._refreshed_at is None:
+            return True
+        return time.monotonic() - self._refreshed_at >= settings.tenant_directory_refresh_seconds
+
+    async def _lookup(self, slug: str) -> Optional[bool]:
+        session = await self._lookup_session_factory()
+        try:
+            result = await session.execute(
+                select(Organization.is_active, Organization.provisioning_status)
+                .where(Organization.slug == slug)
+            )
+            row = result.first()
+        finally:
+            await session.close()
+        return None if row is None else _is_routable(*row)
+
+def _is_routable(is_active: Optional[bool], provisioning_status: Optional[str]) -> bool:
+    # Tenants still being provisioned have no database to route to yet
+    return bool(is_active) and provisioning_status == "ready"
+
+tenant_directory = TenantDirectory(
+    db_manager.get_core_read_session, lookup_session_factory=db_manager.get_core_session
+)
@@ -1,48 +1,84 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from pydantic import ValidationError
+from app.config import settings
 from app.models.core import CoreUser
 from app.models.tenant import TenantUser
-from app.schemas.auth import UserRegister
-from app.core.security import get_password_hash, verify_password
-from typing import Optional
+from app.schemas.auth import (
+    UserRegister, TenantUserImport, BulkImportError, BulkImportResult
+)
+from app.core.security import get_password_hash_async, get_password_hash_bulk_async, verify_password_async
+from app.core.cache import user_cache, user_cache_key
+from app.database.core import insert_ignoring_conflicts
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import csv
+import json
+
+IMPORT_COLUMNS = ("email", "password", "full_name", "bio", "phone")
+
+async def _parse_import_rows(
+    lines: AsyncIterator[str], format: str
+) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (row number, fields, parse error) for each non-blank line"""
+    header = None
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if format == "csv" and header is None:
+            header = [column.strip() for column in next(csv.reader([line]))]
+            continue
+        
+        row_number += 1
+        try:
+            if format == "csv":
+                fields = dict(zip(header, next(csv.reader([line]))))
+            else:
+                fields = json.loads(line)
+                if not isinstance(fields, dict):
+                    raise ValueError("expected a JSON object")
+        except (ValueError, csv.Error) as e:
+            yield row_number, None, f"Unreadable row: {e}"
+            continue
+        yield row_number, fields, None
 
 class UserService:
     @staticmethod
     async def create_core_user(db: AsyncSession, user_data: UserRegister) -> CoreUser:
-        # Check if user already exists
-        result = await db.execute(select(CoreUser).where(CoreUser.email == user_data.email))
-        if result.scalar_one_or_none():
-            raise ValueError("Email already registered")
-        
-        hashed_password = get_password_hash(user_data.password)
-        db_user = CoreUser(
-            email=user_data.email,
-            hashed_password=hashed_password,
-            full_name=user_data.full_name
-        )
-        
-        db.add(db_user)
-        await db.commit()
-        await db.refresh(db_user)
+        db_user = await UserService._insert_user(db, CoreUser, user_data)
+        user_cache.invalidate(user_cache_key("core", None, db_user.id))
         return db_user
     
     @staticmethod
     async def create_tenant_user(db: AsyncSession, user_data: UserRegister) -> TenantUser:
-        # Check if user already exists
-        result = await db.execute(select(TenantUser).where(TenantUser.email == user_data.email))
-        if result.scalar_one_or_none():
-            raise ValueError("Email already registered")
+        db_user = await UserService._insert_user(db, TenantUser, user_data)
+        user_cache.invalidate(user_cache_key("tenant", db.info.get("tenant"), db_user.id))
+        return db_user
+    
+    @staticmethod
+    async def _insert_user(db: AsyncSession, model, user_data: UserRegister):
+        """Create the user with one INSERT ... ON CONFLICT DO NOTHING RETURNING.
         
-        hashed_password = get_password_hash(user_data.password)
-        db_user = TenantUser(
+        The unique email index decides atomically whether the address is
+        taken; no row back means it was. RETURNING also brings back the
+        server defaults, so no refresh is needed. The password is hashed
+        before the insert, so a duplicate registration still costs a hash;
+        that keeps a new registration to one statement and one commit.
+        """
+        hashed_password = await get_password_hash_async(user_data.password)
+        statement = insert_ignoring_conflicts(db, model, ["email"]).values(
             email=user_data.email,
             hashed_password=hashed_password,
             full_name=user_data.full_name
-        )
+        ).returning(model)
         
-        db.add(db_user)
+        db_user = (await db.scalars(statement)).one_or_none()
+        if db_user is None:
+            # Nothing was written; closing the session ends the transaction
+            raise ValueError("Email already registered")
         await db.commit()
-        await db.refresh(db_user)
         return db_user
     
     @staticmethod
@@ -50,7 +86,7 @@ class UserService:
         result = await db.execute(select(CoreUser).where(CoreUser.email == email))
         user = result.scalar_one_or_none()
         
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await verify_password_async(password, user.hashed_password):
             return None
         
         return user
@@ -60,7 +96,119 @@ class UserService:
         result = await db.execute(select(TenantUser).where(TenantUser.email == email))
         user = result.scalar_one_or_none()
         
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await verify_password_async(password, user.hashed_password):
             return None
         
         return user
+    
+    @staticmethod
+    async def list_tenant_users(
+        db: AsyncSession,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        is_active: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> Tuple[List[TenantUser], Optional[int]]:
+        """Return one page of tenant users ordered by id, plus the next cursor.
+        
+        Pages continue from ``after_id`` (keyset pagination), so every page is
+        a primary-key range scan no matter how deep into the table it is.
+        """
+        query = select(TenantUser).order_by(TenantUser.id).limit(limit + 1)
+        if after_id is not None:
+            query = query.where(TenantUser.id > after_id)
+        if is_active is not None:
+            query = query.where(TenantUser.is_active == is_active)
+        if created_after is not None:
+            query = query.where(TenantUser.created_at >= created_after)
+        if created_before is not None:
+            query = query.where(TenantUser.created_at < created_before)
+        
+        result = await db.execute(query)
+        users = list(result.scalars())
+        
+        # The extra row only tells us whether another page exists
+        if len(users) > limit:
+            users = users[:limit]
+            return users, users[-1].id
+        return users, None
+    
+    @staticmethod
+    async def import_tenant_users(
+        db: AsyncSession, lines: AsyncIterator[str], format: str
+    ) -> BulkImportResult:
+        """Bulk-create tenant users from CSV or NDJSON lines.
+        
+        Rows are processed in batches: passwords are hashed concurrently in
+        the hashing pool and each batch is written with one multi-row
+        INSERT ... ON CONFLICT DO NOTHING, so memory use depends on the batch
+        size rather than the size of the upload.
+        """
+        result = BulkImportResult(imported=0, duplicates=0, invalid=0, errors=[])
+        batch: List[Tuple[int, TenantUserImport]] = []
+        
+        def report(row: int, email: Optional[str], error: str):
+            if len(result.errors) < settings.bulk_import_max_reported_errors:
+                result.errors.append(BulkImportError(row=row, email=email, error=error))
+            else:
+                result.errors_truncated = True
+        
+        async for row_number, fields, parse_error in _parse_import_rows(lines, format):
+            if parse_error is not None:
+                result.invalid += 1
+                report(row_number, None, parse_error)
+                continue
+            try:
+                user = TenantUserImport.model_validate(
+                    {key: fields.get(key) or None for key in IMPORT_COLUMNS}
+                )
+            except ValidationError as e:
+                result.invalid += 1
+                report(row_number, fields.get("email"), e.errors()[0]["msg"])
+                continue
+            
+            batch.append((row_number, user))
+            if len(batch) >= settings.bulk_import_batch_size:
+                await UserService._import_batch(db, batch, result, report)
+                batch = []
+        
+        if batch:
+            await UserService._import_batch(db, batch, result, report)
+        return result
+    
+    @staticmethod
+    async def _import_batch(db: AsyncSession, batch, result: BulkImportResult, report):
+        # Repeats within the batch are duplicates; don't spend bcrypt on them
+        unique = {}
+        for row_number, user in batch:
+            if user.email in unique:
+                result.duplicates += 1
+                report(row_number, user.email, "Email already registered")
+            else:
+                unique[user.email] = (row_number, user)
+        
+        rows = list(unique.values())
+        hashes = await asyncio.gather(
+            *(get_password_hash_bulk_async(user.password) for _, user in rows)
+        )
+        statement = insert_ignoring_conflicts(db, TenantUser, ["email"]).values([
+            {
+                "email": user.email,
+                "hashed_password": hashed_password,
+                "full_name": user.full_name,
+                "bio": user.bio,
+                "phone": user.phone,
+                "is_active": True,
+            }
+            for (_, user), hashed_password in zip(rows, hashes)
+        ]).returning(TenantUser.email)
+        
+        inserted = set((await db.execute(statement)).scalars())
+        await db.commit()
+        
+        result.imported += len(inserted)
+        for row_number, user in rows:
+            if user.email not in inserted:
+                result.duplicates += 1
+                report(row_number, user.email, "Email already registered")
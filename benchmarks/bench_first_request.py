@@ -0,0 +1,115 @@
+"""Measure the first-request cost per tenant with and without the shared compiled-SQL cache.
+
+Every tenant's first request creates its engine, opens a connection and
+runs the statements of a typical first session: the login lookup by email,
+a primary-key load, a page of the user list and a registration insert.
+Without the shared cache each new engine compiles all of them again; with
+it only the very first tenant does. Each mode runs against ``--tenants``
+SQLite databases copied from one prepared file, and reports the first
+request split into connect and query time, plus the compiled-cache misses
+and RSS growth per engine.
+
+SQLite has no server round trip, so compilation is a larger share of the
+total than against PostgreSQL, where asyncpg also prepares each new
+statement once per connection (see ``tenant_prepared_statement_cache_size``).
+
+    python -m benchmarks.bench_first_request --tenants 500
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+from benchmarks.bench_tenant_scaling import prepare_tenants, raise_open_file_limit, rss_bytes, summarize
+from sqlalchemy import select
+from app.config import settings
+from app.database.core import DatabaseManager, insert_ignoring_conflicts
+from app.models.tenant import TenantUser
+from app.services.user_service import UserService
+
+MODES = {"per-engine": 0, "shared": settings.tenant_compiled_cache_size}
+
+async def first_session(manager: DatabaseManager, slug: str):
+    session = await manager.get_tenant_session(slug)
+    try:
+        started = time.perf_counter()
+        await session.connection()
+        connected = time.perf_counter()
+
+        await session.execute(select(TenantUser).where(TenantUser.email == f"owner@{slug}.example.com"))
+        await session.get(TenantUser, 1)
+        await UserService.list_tenant_users(session, limit=20)
+        await session.execute(
+            insert_ignoring_conflicts(session, TenantUser, ["email"]).values(
+                email=f"user@{slug}.example.com", hashed_password="x"
+            ).returning(TenantUser)
+        )
+        await session.rollback()
+        return connected - started, time.perf_counter() - connected
+    finally:
+        await session.close()
+
+async def measure(slugs: List[str], mode: str) -> dict:
+    settings.tenant_compiled_cache_size = MODES[mode]
+    settings.tenant_engine_cache_size = len(slugs)
+    manager = DatabaseManager()
+
+    gc.collect()
+    rss_before = rss_bytes()
+    connect, queries, total = [], [], []
+    for slug in slugs:
+        started = time.perf_counter()
+        connect_seconds, query_seconds = await first_session(manager, slug)
+        total.append(time.perf_counter() - started)
+        connect.append(connect_seconds)
+        queries.append(query_seconds)
+
+    gc.collect()
+    result = {
+        "mode": mode,
+        "tenants": len(slugs),
+        "first_request": summarize(total),
+        "connect": summarize(connect),
+        "queries": summarize(queries),
+        "compiled_cache": manager.compiled_cache_stats(),
+        "rss_per_engine_kib": (rss_bytes() - rss_before) / len(slugs) / 1024,
+    }
+    await manager.shutdown(timeout=5)
+    return result
+
+def print_table(results: List[dict]):
+    print(f"{'mode':>11} {'first p50':>10} {'first p99':>10} {'connect p50':>12} {'queries p50':>12} "
+          f"{'misses':>7} {'KiB/engine':>11}")
+    for r in results:
+        print(
+            f"{r['mode']:>11} {r['first_request']['p50_us']:>8.0f}us {r['first_request']['p99_us']:>8.0f}us "
+            f"{r['connect']['p50_us']:>10.0f}us {r['queries']['p50_us']:>10.0f}us "
+            f"{r['compiled_cache'].get('misses', '-'):>7} {r['rss_per_engine_kib']:>11.1f}"
+        )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, default=200)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    raise_open_file_limit()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        settings.database_url = f"sqlite+aiosqlite:///{workdir}/core.db"
+        settings.tenant_warmup_state_file = os.path.join(workdir, "warmup.json")
+        slugs = prepare_tenants(workdir, args.tenants)
+        for mode in MODES:
+            results.append(await measure(slugs, mode))
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
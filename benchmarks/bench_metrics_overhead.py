@@ -0,0 +1,62 @@
+"""Measure the per-query cost of the database metrics listeners.
+
+Runs ``--queries`` trivial statements against an in-memory SQLite database,
+once on a bare engine and once on an instrumented one, and reports the
+difference per query. SQLite keeps the statement itself cheap, so the
+overhead is shown against the smallest realistic query time.
+
+    python -m benchmarks.bench_metrics_overhead --queries 20000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("database_url", "sqlite+aiosqlite:///./benchmark.db")
+os.environ.setdefault("jwt_secret_key", "bench-metrics-overhead")
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database.metrics import InstrumentedPool, db_metrics
+
+async def run(instrumented: bool, queries: int) -> float:
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///file:bench?mode=memory&cache=shared&uri=true",
+        poolclass=InstrumentedPool
+    )
+    if instrumented:
+        db_metrics.instrument(engine, "bench")
+    statement = text("SELECT 1")
+    try:
+        async with engine.connect() as conn:
+            # Warm the compiled cache so both runs measure steady state
+            await conn.execute(statement)
+            started = time.perf_counter()
+            for _ in range(queries):
+                await conn.execute(statement)
+            return (time.perf_counter() - started) / queries
+    finally:
+        await engine.dispose()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    bare, instrumented = [], []
+    # Alternate the runs so drift in machine load affects both equally
+    for _ in range(args.rounds):
+        bare.append(await run(False, args.queries))
+        instrumented.append(await run(True, args.queries))
+
+    base = statistics.median(bare)
+    with_metrics = statistics.median(instrumented)
+    overhead = with_metrics - base
+    print(f"bare         {base * 1e6:8.2f}us/query")
+    print(f"instrumented {with_metrics * 1e6:8.2f}us/query")
+    print(f"overhead     {overhead * 1e6:8.2f}us/query ({overhead / base:+.1%})")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Compare per-response CPU of the old and new response serialization paths.
+
+"before" is what the routes used to do: ``model_validate`` the ORM row in
+the handler, then FastAPI's validation and encoding against
+``response_model`` and a ``JSONResponse``. "after" is the single-pass
+``JSONSerializer`` plus orjson path. Both are timed for one tenant user
+(GET /me) and for a 50-user page (GET /users).
+
+    python -m benchmarks.bench_serialization --iterations 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("database_url", "sqlite+aiosqlite:///./benchmark.db")
+os.environ.setdefault("jwt_secret_key", "bench-serialization")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.core.serialization import ORJSONResponse
+from app.models.tenant import TenantUser
+from app.schemas.auth import TenantUserPage, TenantUserResponse, tenant_user_json, tenant_user_page_json
+
+def make_user(user_id: int) -> TenantUser:
+    return TenantUser(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        hashed_password="x",
+        full_name=f"Tenant User {user_id}",
+        bio="Writes benchmarks for a living",
+        phone="555-0100",
+        is_active=True,
+        created_at=datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    )
+
+async def time_per_call(fn, iterations: int) -> float:
+    await fn()
+    started = time.process_time()
+    for _ in range(iterations):
+        await fn()
+    return (time.process_time() - started) / iterations
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    user = make_user(1)
+    page = [make_user(i) for i in range(50)]
+    user_field = create_model_field("response", TenantUserResponse, mode="serialization")
+    page_field = create_model_field("response", TenantUserPage, mode="serialization")
+
+    async def user_before():
+        content = await serialize_response(
+            field=user_field, response_content=TenantUserResponse.model_validate(user)
+        )
+        return JSONResponse(content).body
+
+    async def user_after():
+        return ORJSONResponse(user, tenant_user_json).body
+
+    async def page_before():
+        result = TenantUserPage(
+            items=[TenantUserResponse.model_validate(row) for row in page], next_cursor=49
+        )
+        content = await serialize_response(field=page_field, response_content=result)
+        return JSONResponse(content).body
+
+    async def page_after():
+        return ORJSONResponse(tenant_user_page_json.build(items=page, next_cursor=49)).body
+
+    for label, before, after, iterations in (
+        ("GET /me", user_before, user_after, args.iterations),
+        ("GET /users (50)", page_before, page_after, max(args.iterations // 50, 100)),
+    ):
+        old = await time_per_call(before, iterations)
+        new = await time_per_call(after, iterations)
+        print(f"{label:<16} before {old * 1e6:8.1f}us  after {new * 1e6:8.1f}us  ({old / new:.1f}x)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
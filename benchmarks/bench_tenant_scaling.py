@@ -0,0 +1,163 @@
+"""Measure how DatabaseManager scales with the number of tenants.
+
+For every population size in ``--tenants`` a fresh DatabaseManager is
+pointed at that many SQLite tenant databases (copied from one prepared
+file, much like the PostgreSQL template database). The benchmark then
+measures:
+
+* first request: engine creation, first connection and one query per tenant
+* RSS growth per cached engine, read from /proc after the first requests
+* steady state: session lookup alone, and lookup plus one query, for
+  tenants picked at random
+
+Engines beyond ``--cache-size`` (default: the configured engine cache
+size) are evicted as in production. Pass ``--cache-size`` at least as large
+as the population to keep every engine alive; each holds an open file, so
+the open-file limit is raised as far as the hard limit allows.
+
+    python -m benchmarks.bench_tenant_scaling --tenants 100 1000 10000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+os.environ.setdefault("database_url", "sqlite+aiosqlite:///./benchmark.db")
+os.environ.setdefault("jwt_secret_key", "bench-tenant-scaling")
+
+from sqlalchemy import create_engine, select
+from app.config import settings
+from app.database.core import DatabaseManager
+from app.models.tenant import TenantBase, TenantUser
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Not Linux: fall back to the peak, which still grows with the population
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def raise_open_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def prepare_tenants(workdir: str, tenants: int) -> List[str]:
+    template = os.path.join(workdir, "template.db")
+    if not os.path.exists(template):
+        engine = create_engine(f"sqlite:///{template}")
+        TenantBase.metadata.create_all(engine)
+        engine.dispose()
+
+    slugs = [f"tenant-{i}" for i in range(tenants)]
+    for slug in slugs:
+        path = os.path.join(workdir, f"multitenant_{slug}")
+        if not os.path.exists(path):
+            shutil.copyfile(template, path)
+    return slugs
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    ordered = sorted(seconds)
+    return {
+        "mean_us": statistics.mean(ordered) * 1e6,
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+    }
+
+async def request(manager: DatabaseManager, slug: str, query: bool):
+    session = await manager.get_tenant_session(slug)
+    try:
+        if query:
+            await session.execute(select(TenantUser.id).limit(1))
+    finally:
+        await session.close()
+
+async def measure(workdir: str, tenants: int, cache_size: int, lookups: int) -> dict:
+    slugs = prepare_tenants(workdir, tenants)
+    settings.tenant_engine_cache_size = cache_size
+    manager = DatabaseManager()
+
+    gc.collect()
+    rss_before = rss_bytes()
+
+    first = []
+    for slug in slugs:
+        started = time.perf_counter()
+        await request(manager, slug, query=True)
+        first.append(time.perf_counter() - started)
+
+    gc.collect()
+    cached = manager.engine_cache_stats()["size"]
+    rss_per_engine = (rss_bytes() - rss_before) / max(cached, 1)
+
+    # Steady state only revisits tenants whose engines are still cached
+    warm = manager._tenant_engines.recent(cache_size)
+    lookup, lookup_query = [], []
+    for _ in range(lookups):
+        slug = random.choice(warm)
+        started = time.perf_counter()
+        await request(manager, slug, query=False)
+        lookup.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await request(manager, slug, query=True)
+        lookup_query.append(time.perf_counter() - started)
+
+    result = {
+        "tenants": tenants,
+        "cached_engines": cached,
+        "evictions": manager.engine_cache_stats()["evictions"],
+        "rss_per_engine_kib": rss_per_engine / 1024,
+        "first_request": summarize(first),
+        "lookup": summarize(lookup),
+        "lookup_and_query": summarize(lookup_query),
+    }
+    await manager.shutdown(timeout=5)
+    return result
+
+def print_table(results: List[dict]):
+    print(
+        f"{'tenants':>8} {'cached':>7} {'KiB/engine':>11} "
+        f"{'first p50':>10} {'first p99':>10} {'lookup p50':>11} {'lookup p99':>11} {'+query p50':>11}"
+    )
+    for r in results:
+        print(
+            f"{r['tenants']:>8} {r['cached_engines']:>7} {r['rss_per_engine_kib']:>11.1f} "
+            f"{r['first_request']['p50_us'] / 1000:>8.2f}ms {r['first_request']['p99_us'] / 1000:>8.2f}ms "
+            f"{r['lookup']['p50_us']:>9.1f}us {r['lookup']['p99_us']:>9.1f}us "
+            f"{r['lookup_and_query']['p50_us']:>9.1f}us"
+        )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--cache-size", type=int, default=settings.tenant_engine_cache_size)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    raise_open_file_limit()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Tenant URLs are derived from the core URL's directory
+        settings.database_url = f"sqlite+aiosqlite:///{workdir}/core.db"
+        settings.tenant_warmup_state_file = os.path.join(workdir, "warmup.json")
+        for tenants in sorted(args.tenants):
+            results.append(await measure(workdir, tenants, args.cache_size, args.lookups))
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
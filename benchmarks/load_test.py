@@ -0,0 +1,240 @@
+"""Load test of the API through httpx's ASGI transport.
+
+Runs the real application in-process against SQLite files in a temporary
+directory (one core database plus one per tenant, as DatabaseManager lays
+them out). ``--users`` virtual users are spread over ``--tenants``
+tenants and run with ``--concurrency`` at a time. Each one registers as a
+tenant user, logs in, reads and updates its profile; every
+``--org-every``-th user also registers a core user, logs in and creates an
+organization, which is provisioned in the background as in production.
+
+Throughput and per-operation p50/p95/p99 latency are printed and saved as
+JSON. Given ``--baseline``, the run is compared against an earlier result
+and exits non-zero when throughput drops or a p95/p99 grows by more than
+``--tolerance``::
+
+    python -m benchmarks.load_test --users 200 --concurrency 20 --output base.json
+    python -m benchmarks.load_test --users 200 --concurrency 20 --baseline base.json
+
+Absolute numbers depend on the machine and on bcrypt's cost, so only
+compare runs made on the same machine with the same arguments.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# Settings are read at import time; these only apply when the caller has not
+# configured the application
+os.environ.setdefault("database_url", "sqlite+aiosqlite:///./benchmark.db")
+os.environ.setdefault("jwt_secret_key", "load-test")
+
+from httpx import ASGITransport, AsyncClient
+from app.config import settings
+from app.core.security import get_password_hash
+from app.database.core import Base, db_manager
+from app.main import app
+from app.models.core import CoreUser, Organization
+from app.services.provisioning import provisioning_pipeline
+
+class Recorder:
+    """Latencies and failures per operation"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: AsyncClient, operation: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            response = None
+        self.latencies[operation].append(time.perf_counter() - started)
+        if response is None or response.status_code >= 400:
+            self.errors[operation] += 1
+            return None
+        return response
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def setup(tenants: int) -> List[str]:
+    """Create the core schema and ``tenants`` ready organizations"""
+    engine = await db_manager.get_core_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    slugs = [f"tenant-{i}" for i in range(tenants)]
+    session = await db_manager.get_core_session()
+    try:
+        owner = CoreUser(
+            email="owner@bench.example.com",
+            hashed_password=get_password_hash("bench-password"),
+            full_name="Benchmark Owner"
+        )
+        session.add(owner)
+        await session.flush()
+        session.add_all([
+            Organization(name=slug, slug=slug, owner_id=owner.id, provisioning_status="ready")
+            for slug in slugs
+        ])
+        await session.commit()
+    finally:
+        await session.close()
+
+    for slug in slugs:
+        await db_manager.create_tenant_tables(slug)
+    return slugs
+
+async def _create_sqlite_database(job):
+    # SQLite creates the tenant's database file on first connect
+    job.cloned_from_template = False
+
+async def virtual_user(client: AsyncClient, recorder: Recorder, index: int, tenant: str, create_org: bool):
+    password = "bench-password"
+    email = f"user{index}@bench.example.com"
+    tenant_headers = {"X-TENANT": tenant}
+
+    await recorder.request(client, "register", "POST", "/api/auth/register", headers=tenant_headers,
+                           json={"email": email, "password": password, "full_name": f"User {index}"})
+    response = await recorder.request(client, "login", "POST", "/api/auth/login", headers=tenant_headers,
+                                      json={"email": email, "password": password})
+    if response is not None:
+        auth = {**tenant_headers, "Authorization": f"Bearer {response.json()['access_token']}"}
+        await recorder.request(client, "get_me", "GET", "/api/users/me", headers=auth)
+        await recorder.request(client, "put_me", "PUT", "/api/users/me", headers=auth,
+                               json={"bio": f"Updated by virtual user {index}"})
+
+    if not create_org:
+        return
+    owner_email = f"owner{index}@bench.example.com"
+    await recorder.request(client, "register_core", "POST", "/api/auth/register",
+                           json={"email": owner_email, "password": password, "full_name": f"Owner {index}"})
+    response = await recorder.request(client, "login_core", "POST", "/api/auth/login",
+                                      json={"email": owner_email, "password": password})
+    if response is not None:
+        auth = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        await recorder.request(client, "create_org", "POST", "/api/organizations/", headers=auth,
+                               json={"name": f"Org {index}", "slug": f"org-{index}"})
+
+async def run(args) -> dict:
+    slugs = await setup(args.tenants)
+    provisioning_pipeline.steps[0] = ("create_database", _create_sqlite_database)
+
+    recorder = Recorder()
+    users = iter(range(args.users))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            # Workers share one iterator, so each virtual user runs exactly once
+            for index in users:
+                await virtual_user(
+                    client, recorder, index, slugs[index % len(slugs)], index % args.org_every == 0
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        duration = time.perf_counter() - started
+
+    await provisioning_pipeline.shutdown(settings.shutdown_drain_timeout_seconds)
+    await db_manager.shutdown(settings.shutdown_drain_timeout_seconds)
+
+    operations = {}
+    for operation, latencies in sorted(recorder.latencies.items()):
+        ordered = sorted(latencies)
+        operations[operation] = {
+            "count": len(ordered),
+            "errors": recorder.errors[operation],
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+        }
+    total = sum(op["count"] for op in operations.values())
+    return {
+        "config": {
+            "users": args.users,
+            "tenants": args.tenants,
+            "concurrency": args.concurrency,
+            "org_every": args.org_every,
+        },
+        "duration_seconds": duration,
+        "requests": total,
+        "errors": sum(op["errors"] for op in operations.values()),
+        "throughput_rps": total / duration if duration else 0.0,
+        "operations": operations,
+    }
+
+def print_report(result: dict):
+    print(
+        f"{result['requests']} requests in {result['duration_seconds']:.2f}s, "
+        f"{result['throughput_rps']:.1f} req/s, {result['errors']} errors"
+    )
+    print(f"{'operation':<14} {'count':>6} {'errors':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for operation, stats in result["operations"].items():
+        print(
+            f"{operation:<14} {stats['count']:>6} {stats['errors']:>6} "
+            f"{stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms"
+        )
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Describe every metric that regressed by more than ``tolerance``"""
+    if result["config"] != baseline["config"]:
+        print(f"warning: baseline was run with {baseline['config']}")
+
+    regressions = []
+    before, after = baseline["throughput_rps"], result["throughput_rps"]
+    if before and after < before * (1 - tolerance):
+        regressions.append(f"throughput {before:.1f} -> {after:.1f} req/s")
+
+    for operation, stats in result["operations"].items():
+        previous: Optional[dict] = baseline["operations"].get(operation)
+        if previous is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if previous[metric] and stats[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{operation} {metric[:3]} {previous[metric]:.1f} -> {stats[metric]:.1f}ms"
+                )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--org-every", type=int, default=10)
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Tenant databases are created next to the core one
+        settings.database_url = f"sqlite+aiosqlite:///{workdir}/core.db"
+        settings.tenant_warmup_state_file = os.path.join(workdir, "warmup.json")
+        result = asyncio.run(run(args))
+
+    print_report(result)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 import pytest
 import asyncio
 from httpx import AsyncClient, ASGITransport
+from fastapi import Request
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.database.core import db_manager, Base
 from app.models.tenant import TenantBase
-from app.core.deps import get_core_db, get_tenant_db
+from app.core.deps import (
+    get_core_db, get_core_read_db, get_tenant_db, get_tenant_read_db,
+    get_optional_tenant_db, get_optional_tenant_read_db
+)
+from app.core.cache import user_cache
 import os
 
 # Test database URLs
@@ -21,6 +26,13 @@ def event_loop():
     yield loop
     loop.close()
 
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Each test starts with fresh databases, so cached rows must not carry over."""
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
 @pytest.fixture
 async def test_core_engine():
     """Create test core database engine."""
@@ -69,6 +81,18 @@ async def test_core_db(test_core_engine):
     async with async_session() as session:
         yield session
 
+@pytest.fixture
+def core_session_factory(test_core_engine):
+    """Async factory of test core sessions, for services that open their own."""
+    async_session = async_sessionmaker(
+        test_core_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    
+    async def session_factory():
+        return async_session()
+    
+    return session_factory
+
 @pytest.fixture
 async def test_tenant_db(test_tenant_engine):
     """Create test tenant database session."""
@@ -89,8 +113,15 @@ async def client(test_core_db, test_tenant_db):
     async def override_get_tenant_db():
         yield test_tenant_db
     
+    async def override_get_optional_tenant_db(request: Request):
+        yield test_tenant_db if request.headers.get("X-TENANT") else None
+    
     app.dependency_overrides[get_core_db] = override_get_core_db
+    app.dependency_overrides[get_core_read_db] = override_get_core_db
     app.dependency_overrides[get_tenant_db] = override_get_tenant_db
+    app.dependency_overrides[get_tenant_read_db] = override_get_tenant_db
+    app.dependency_overrides[get_optional_tenant_db] = override_get_optional_tenant_db
+    app.dependency_overrides[get_optional_tenant_read_db] = override_get_optional_tenant_db
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://testserver") as ac:
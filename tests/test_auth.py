@@ -2,7 +2,7 @@ import pytest
 from httpx import AsyncClient
 from app.models.core import CoreUser
 from app.models.tenant import TenantUser
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash, create_access_token
 
 class TestAuth:
     
@@ -63,6 +63,8 @@ class TestAuth:
         data = response.json()
         assert data["email"] == user_data["email"]
         assert data["full_name"] == user_data["full_name"]
+        # The response follows UserResponse, without the tenant profile fields
+        assert "bio" not in data and "phone" not in data
     
     @pytest.mark.asyncio
     async def test_core_user_login(self, client: AsyncClient, test_core_db):
@@ -126,4 +128,50 @@ class TestAuth:
         assert response.status_code == 200
         data = response.json()
         assert "access_token" in data
-        assert data["token_type"] == "bearer"
\ No newline at end of file
+        assert data["token_type"] == "bearer"
+    
+    @pytest.mark.asyncio
+    async def test_core_token_refresh(self, client: AsyncClient, test_core_db):
+        """Test exchanging a refresh token for new tokens"""
+        user = CoreUser(
+            email="refresh@example.com",
+            hashed_password=get_password_hash("password123"),
+            full_name="Refresh User"
+        )
+        test_core_db.add(user)
+        await test_core_db.commit()
+        
+        login_data = {
+            "email": "refresh@example.com",
+            "password": "password123"
+        }
+        login_response = await client.post("/api/auth/login", json=login_data)
+        refresh_token = login_response.json()["refresh_token"]
+        
+        response = await client.post(
+            "/api/auth/refresh", json={"refresh_token": refresh_token}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert "access_token" in data
+        assert "refresh_token" in data
+    
+    @pytest.mark.asyncio
+    async def test_refresh_rejects_access_token(self, client: AsyncClient, test_core_db):
+        """Test an access token cannot be used as a refresh token"""
+        user = CoreUser(
+            email="notrefresh@example.com",
+            hashed_password=get_password_hash("password123"),
+            full_name="Access User"
+        )
+        test_core_db.add(user)
+        await test_core_db.commit()
+        await test_core_db.refresh(user)
+        
+        access_token = create_access_token(data={"user_id": user.id, "context": "core"})
+        response = await client.post(
+            "/api/auth/refresh", json={"refresh_token": access_token}
+        )
+        
+        assert response.status_code == 401
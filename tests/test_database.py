@@ -0,0 +1,514 @@
+import pytest
+import asyncio
+import sqlite3
+from datetime import timedelta
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.config import settings
+from app.database.budget import ConnectionBudget
+from app.database.core import Base, DatabaseManager, tenant_metadata_fingerprint
+from app.database.engine_cache import TenantEngineCache
+from app.database.metrics import DatabaseMetrics, Histogram, InstrumentedPool
+from app.database.placement import ConsistentHashPolicy, LeastLoadedPolicy
+from app.models.core import CoreUser, Organization, TenantPlacement
+from app.models.tenant import TenantUser
+from app.database.tenant_migrations import MigrationState, migrate_tenant, tenant_head_revision
+
+def sqlite_factory(key: str):
+    return create_async_engine("sqlite+aiosqlite://")
+
+class TestTenantEngineCache:
+
+    @pytest.mark.asyncio
+    async def test_hits_and_misses(self):
+        """Test repeated lookups reuse the cached engine"""
+        cache = TenantEngineCache(sqlite_factory, max_size=10, idle_ttl=0)
+
+        first = cache.get("acme")
+        second = cache.get("acme")
+
+        assert first is second
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        """Test the cache never grows past its max size"""
+        cache = TenantEngineCache(sqlite_factory, max_size=2, idle_ttl=0)
+
+        cache.get("a")
+        cache.get("b")
+        cache.get("a")
+        cache.get("c")
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_idle_engines_expire(self):
+        """Test engines unused for longer than the idle TTL are evicted"""
+        cache = TenantEngineCache(sqlite_factory, max_size=10, idle_ttl=0.01)
+
+        cache.get("a")
+        await asyncio.sleep(0.02)
+        cache.get("b")
+
+        assert "a" not in cache
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_eviction_waits_for_checked_out_connections(self):
+        """Test an evicted engine is only disposed after its connections return"""
+        cache = TenantEngineCache(sqlite_factory, max_size=1, idle_ttl=0)
+
+        entry = cache.get("a")
+        conn = await entry.engine.connect()
+        await conn.execute(text("SELECT 1"))
+
+        cache.get("b")
+        assert entry.evicted
+        assert cache.stats()["draining"] == 1
+
+        await conn.close()
+        assert cache.stats()["draining"] == 0
+
+class TestLifecycle:
+
+    @pytest.fixture
+    def sqlite_settings(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/core.db")
+        monkeypatch.setattr(settings, "tenant_warmup_state_file", str(tmp_path / "warmup.json"))
+        return tmp_path
+
+    @pytest.mark.asyncio
+    async def test_shutdown_saves_tenants_warmed_on_startup(self, sqlite_settings):
+        """Test the tenants used before a restart are warmed after it"""
+        manager = DatabaseManager()
+        for slug in ("acme", "globex"):
+            session = await manager.get_tenant_session(slug)
+            await session.close()
+
+        assert await manager.shutdown(timeout=1)
+        assert len(manager._tenant_engines) == 0
+
+        restarted = DatabaseManager()
+        assert await restarted.startup() == 2
+        assert "acme" in restarted._tenant_engines
+        await restarted.shutdown(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_shutdown_waits_for_open_sessions(self, sqlite_settings):
+        """Test shutdown stops accepting work and drains open sessions"""
+        manager = DatabaseManager()
+        session = await manager.get_core_session()
+
+        async def finish_request():
+            await asyncio.sleep(0.05)
+            await session.close()
+
+        closer = asyncio.create_task(finish_request())
+        assert await manager.shutdown(timeout=1)
+        assert not manager.accepting
+        assert closer.done()
+
+    @pytest.mark.asyncio
+    async def test_budget_slot_is_taken_on_first_use(self, sqlite_settings):
+        """Test an unused tenant session holds neither a budget slot nor a connection"""
+        manager = DatabaseManager()
+        session = await manager.get_tenant_session("acme")
+        assert manager._connection_budget.in_use == 0
+
+        await session.execute(text("SELECT 1"))
+        assert manager._connection_budget.in_use == 1
+
+        await session.close()
+        assert manager._connection_budget.in_use == 0
+        await manager.shutdown(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_shutdown_gives_up_after_timeout(self, sqlite_settings):
+        """Test a session that is never closed does not block shutdown forever"""
+        manager = DatabaseManager()
+        session = await manager.get_core_session()
+
+        assert not await manager.shutdown(timeout=0.01)
+        await session.close()
+
+class TestDatabaseMetrics:
+
+    @pytest.mark.asyncio
+    async def test_queries_are_counted_per_tenant(self, tmp_path):
+        """Test statements, checkouts and connections are recorded under the engine label"""
+        metrics = DatabaseMetrics()
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/acme.db", poolclass=InstrumentedPool)
+        metrics.instrument(engine, "acme")
+
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with pytest.raises(Exception):
+                await conn.execute(text("SELECT * FROM missing"))
+        await engine.dispose()
+
+        acme = metrics.for_label("acme")
+        assert acme.queries == 2
+        assert acme.query_errors == 1
+        assert acme.query_duration.count == 1
+        assert acme.connections_opened == acme.connections_closed == 1
+        assert 'multitenant_db_queries_total{tenant="acme",role="primary"} 2' in metrics.render()
+
+    def test_replica_series_get_a_role_label(self):
+        """Test replica engines are exported under their tenant with a replica role"""
+        metrics = DatabaseMetrics()
+        metrics.for_label("acme:replica").queries = 3
+
+        assert 'multitenant_db_queries_total{tenant="acme",role="replica"} 3' in metrics.render()
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, client):
+        """Test /metrics serves database metrics and cache stats as Prometheus text"""
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE multitenant_db_queries_total counter" in response.text
+        assert "# TYPE multitenant_engine_cache_size gauge" in response.text
+        assert "# TYPE multitenant_engine_cache_hits_total counter" in response.text
+
+    @pytest.mark.asyncio
+    async def test_metrics_token(self, client, monkeypatch):
+        """Test /metrics requires the configured token"""
+        monkeypatch.setattr(settings, "metrics_token", "scrape-me")
+
+        response = await client.get("/metrics")
+        assert response.status_code == 401
+
+        response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+        assert response.status_code == 200
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test rendered buckets count every observation at or below the bound"""
+        hist = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            hist.observe(value)
+
+        assert hist.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+        assert hist.count == 4
+
+class TestReadReplicas:
+
+    @pytest.fixture
+    def replica(self, tmp_path, monkeypatch):
+        (tmp_path / "replica").mkdir()
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/core.db")
+        monkeypatch.setattr(settings, "database_replica_url", f"sqlite+aiosqlite:///{tmp_path}/replica/core.db")
+        monkeypatch.setattr(settings, "tenant_warmup_state_file", str(tmp_path / "warmup.json"))
+        return tmp_path
+
+    @pytest.mark.asyncio
+    async def test_reads_are_routed_to_the_replica(self, replica):
+        """Test read sessions for core and tenants use the replica databases"""
+        manager = DatabaseManager()
+
+        core = await manager.get_core_read_session()
+        tenant = await manager.get_tenant_read_session("acme")
+
+        assert "/replica/core.db" in str(core.bind.url)
+        assert str(tenant.bind.url).endswith("/replica/multitenant_acme")
+        await core.close()
+        await tenant.close()
+        await manager.shutdown(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_reads_follow_recent_writes_to_the_primary(self, replica):
+        """Test a tenant written through this process is read from the primary"""
+        manager = DatabaseManager()
+        await manager.create_tenant_tables("acme")
+        writer = await manager.get_tenant_session("acme")
+        await writer.execute(insert(TenantUser).values(email="a@example.com", hashed_password="x"))
+        await writer.commit()
+        await writer.close()
+
+        reader = await manager.get_tenant_read_session("acme")
+        other = await manager.get_tenant_read_session("globex")
+
+        assert "/replica/" not in str(reader.bind.url)
+        assert "/replica/" in str(other.bind.url)
+        await reader.close()
+        await other.close()
+        await manager.shutdown(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_unreachable_replica_fails_over(self, replica, monkeypatch):
+        """Test a replica that cannot connect is marked down and the primary used"""
+        monkeypatch.setattr(settings, "database_replica_url", f"sqlite+aiosqlite:///{replica}/missing/core.db")
+        manager = DatabaseManager()
+
+        session = await manager.get_core_read_session()
+        # The replica is only tried when the session is first used
+        assert "/missing/" in str(session.bind.url)
+        await session.execute(text("SELECT 1"))
+
+        assert "/missing/" not in str(session.bind.url)
+        assert not manager._use_replica("core", "_core")
+        await session.close()
+        await manager.shutdown(timeout=1)
+
+class TestCompiledCache:
+
+    @pytest.mark.asyncio
+    async def test_tenant_engines_share_compiled_sql(self, tmp_path, monkeypatch):
+        """Test a statement compiled for one tenant is reused for the next"""
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/core.db")
+        monkeypatch.setattr(settings, "tenant_warmup_state_file", str(tmp_path / "warmup.json"))
+        manager = DatabaseManager()
+        emails = {}
+        for slug in ("acme", "globex"):
+            await manager.create_tenant_tables(slug)
+            session = await manager.get_tenant_session(slug)
+            await session.execute(insert(TenantUser).values(email=f"owner@{slug}.com", hashed_password="x"))
+            await session.commit()
+            misses = manager.compiled_cache_stats()["misses"]
+            emails[slug] = (await session.scalars(select(TenantUser.email))).all()
+            await session.close()
+
+        stats = manager.compiled_cache_stats()
+        # globex compiled nothing new, and still read its own rows
+        assert stats["misses"] == misses
+        assert stats["hits"] >= 2
+        assert emails == {"acme": ["owner@acme.com"], "globex": ["owner@globex.com"]}
+        await manager.shutdown(timeout=1)
+
+class TestTenantPlacement:
+
+    @pytest.fixture
+    async def servers(self, tmp_path, monkeypatch):
+        (tmp_path / "second").mkdir()
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/core.db")
+        monkeypatch.setattr(settings, "tenant_servers", {"second": f"sqlite+aiosqlite:///{tmp_path}/second"})
+        monkeypatch.setattr(settings, "tenant_warmup_state_file", str(tmp_path / "warmup.json"))
+        manager = DatabaseManager()
+        async with (await manager.get_core_engine()).begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session = await manager.get_core_session()
+        owner = CoreUser(email="owner@example.com", hashed_password="x")
+        session.add(owner)
+        await session.flush()
+        session.add_all([Organization(name=slug, slug=slug, owner_id=owner.id) for slug in ("acme", "globex")])
+        await session.commit()
+        await session.close()
+        yield manager
+        await manager.shutdown(timeout=1)
+
+    def test_least_loaded_policy(self):
+        """Test new tenants go to the server holding the fewest tenants"""
+        policy = LeastLoadedPolicy()
+
+        assert policy.choose("acme", ["a", "b", "c"], {"a": 3, "b": 1, "c": 2}) == "b"
+        assert policy.choose("acme", ["a", "b"], {}) == "a"
+
+    def test_consistent_hash_policy_moves_few_tenants(self):
+        """Test adding a server only claims a share of slugs, all for the new server"""
+        policy = ConsistentHashPolicy()
+        slugs = [f"tenant-{i}" for i in range(1000)]
+
+        before = {slug: policy.choose(slug, ["a", "b", "c"], {}) for slug in slugs}
+        after = {slug: policy.choose(slug, ["a", "b", "c", "d"], {}) for slug in slugs}
+        moved = [slug for slug in slugs if before[slug] != after[slug]]
+
+        assert all(after[slug] == "d" for slug in moved)
+        assert 100 < len(moved) < 400
+
+    @pytest.mark.asyncio
+    async def test_tenants_are_routed_to_their_server(self, servers):
+        """Test placed tenants get engines on their own server, as seen by every process"""
+        assert await servers.placements.place("acme") == "default"
+        assert await servers.placements.place("globex") == "second"
+        # Placing again (a retried provisioning step) keeps the first choice
+        assert await servers.placements.place("globex") == "second"
+
+        session = await servers.get_tenant_session("globex")
+        assert "/second/multitenant_globex" in str(session.bind.url)
+        await session.close()
+
+        other_process = DatabaseManager()
+        assert await other_process.placements.locate("globex") == "second"
+        assert other_process.tenant_database_url("globex").endswith("/second/multitenant_globex")
+        await other_process.shutdown(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_finished_move_switches_routing(self, servers):
+        """Test a tenant is routed to the destination once its move finishes"""
+        # acme predates the extra server, so it has no placement row yet
+        session = await servers.get_tenant_session("acme")
+        await session.close()
+
+        assert await servers.placements.start_move("acme", "second") == "default"
+        with pytest.raises(ValueError, match="already being moved"):
+            await servers.placements.start_move("acme", "second")
+        with pytest.raises(ValueError, match="No organization 'initech'"):
+            await servers.placements.start_move("initech", "second")
+        await servers.placements.finish_move("acme", "second")
+
+        assert "acme" not in servers._tenant_engines
+        session = await servers.get_tenant_session("acme")
+        assert "/second/multitenant_acme" in str(session.bind.url)
+        await session.close()
+
+    @pytest.mark.asyncio
+    async def test_restart_warms_tenants_on_their_server(self, servers):
+        """Test a restarted process warms and routes tenants to their placed server"""
+        await servers.placements.place("acme")
+        assert await servers.placements.place("globex") == "second"
+        session = await servers.get_tenant_session("globex")
+        await session.execute(text("SELECT 1"))
+        await session.close()
+        await servers.shutdown(timeout=1)
+
+        restarted = DatabaseManager()
+        assert await restarted.startup() == 1
+        session = await restarted.get_tenant_session("globex")
+        assert "/second/multitenant_globex" in str(session.bind.url)
+        await session.close()
+        await restarted.shutdown(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_refresh_rereads_placements_committed_late(self, servers):
+        """Test a refresh catches placements stamped before its mark"""
+        await servers.placements.place("acme")
+        other_process = DatabaseManager()
+        await other_process.placements.refresh()
+
+        # Committed after the refresh, from a transaction that started before it
+        session = await servers.get_core_session()
+        globex = await session.scalar(select(Organization.id).where(Organization.slug == "globex"))
+        await session.execute(insert(TenantPlacement).values(
+            organization_id=globex,
+            server="second",
+            created_at=other_process.placements._high_water - timedelta(seconds=1)
+        ))
+        await session.commit()
+        await session.close()
+        other_process.placements._refreshed_at = 0
+        await other_process.placements.refresh()
+
+        assert other_process.placements.server_of("globex") == "second"
+        await other_process.shutdown(timeout=1)
+
+    def test_engine_is_rebuilt_for_another_server(self):
+        """Test a cached engine made for one server is not reused for another"""
+        cache = TenantEngineCache(sqlite_factory, max_size=10, idle_ttl=0)
+
+        first = cache.get("acme", tag="default")
+        assert cache.get("acme", tag="default") is first
+        assert cache.get("acme", tag="second") is not first
+        assert first.evicted
+
+class TestSchemaIsolation:
+
+    @pytest.mark.asyncio
+    async def test_tenant_sessions_share_one_pool(self, monkeypatch):
+        """Test schema mode hands out sessions on a single shared engine"""
+        monkeypatch.setattr(settings, "tenant_isolation", "schema")
+        manager = DatabaseManager()
+
+        first = await manager.get_tenant_session("acme")
+        second = await manager.get_tenant_session("globex")
+
+        assert first.bind is second.bind
+        assert first.info["tenant_schema"] == "tenant_acme"
+        assert second.info["tenant_schema"] == "tenant_globex"
+        assert manager.engine_cache_stats()["size"] == 0
+
+        await first.close()
+        await second.close()
+        await first.bind.dispose()
+
+class TestConnectionBudget:
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_round_robin(self):
+        """Test a busy tenant cannot starve another tenant's waiters"""
+        budget = ConnectionBudget(limit=1)
+        await budget.acquire("hot")
+        served = []
+
+        async def worker(tenant):
+            await budget.acquire(tenant)
+            served.append(tenant)
+            budget.release(tenant)
+
+        tasks = [asyncio.create_task(worker("hot")) for _ in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(worker("cold")))
+        await asyncio.sleep(0)
+
+        budget.release("hot")
+        await asyncio.gather(*tasks)
+
+        assert served[:2] == ["hot", "cold"]
+        assert budget.stats()["waits"] == 4
+        assert budget.in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_gives_up_its_place(self):
+        """Test cancelling a queued acquire does not leak a slot"""
+        budget = ConnectionBudget(limit=1)
+        await budget.acquire("a")
+
+        waiter = asyncio.create_task(budget.acquire("b"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        budget.release("a")
+        assert budget.in_use == 0
+        assert budget.stats()["waiting"] == 0
+
+    def test_pool_size_follows_demand(self):
+        """Test suggested pool sizes stay within the configured bounds"""
+        budget = ConnectionBudget(limit=10)
+
+        assert budget.suggested_pool_size("idle", 1, 5) == 1
+        for _ in range(8):
+            budget._grant("busy")
+        assert budget.suggested_pool_size("busy", 1, 5) == 5
+
+class TestTemplateDatabase:
+
+    def test_fingerprint_is_stable(self):
+        """Test the template fingerprint only depends on the tenant models"""
+        assert tenant_metadata_fingerprint() == tenant_metadata_fingerprint()
+        assert len(tenant_metadata_fingerprint()) == 64
+
+class TestTenantMigrations:
+
+    def test_upgrade_reaches_head(self, tmp_path, monkeypatch):
+        """Test a tenant database is migrated and stamped at the head revision"""
+        monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/core.db")
+
+        migrate_tenant("acme")
+
+        conn = sqlite3.connect(tmp_path / "multitenant_acme")
+        try:
+            version = conn.execute("SELECT version_num FROM alembic_version").fetchone()[0]
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        finally:
+            conn.close()
+        assert version == tenant_head_revision()
+        assert "tenant_users" in tables
+
+    def test_state_survives_restart(self, tmp_path):
+        """Test recorded revisions are read back by the next run"""
+        path = tmp_path / "state.json"
+        state = MigrationState(path)
+        state.record("acme", "abc")
+        state.record("globex", None, error="OperationalError: boom")
+        state.save()
+
+        resumed = MigrationState(path)
+        assert resumed.revision("acme") == "abc"
+        assert resumed.revision("globex") is None
+        assert resumed.revision("initech") is None
@@ -1,12 +1,22 @@
 import pytest
 from httpx import AsyncClient
-from app.models.core import CoreUser
+from app.models.core import CoreUser, Organization
 from app.core.security import get_password_hash, create_access_token
+from app.services.provisioning import provisioning_pipeline
 
 class TestOrganizations:
     
+    @pytest.fixture(autouse=True)
+    def submitted(self, monkeypatch):
+        """Record provisioning jobs instead of creating real tenant databases"""
+        jobs = []
+        monkeypatch.setattr(
+            provisioning_pipeline, "submit", lambda slug, owner: jobs.append(slug)
+        )
+        return jobs
+    
     @pytest.mark.asyncio
-    async def test_create_organization_success(self, client: AsyncClient, test_core_db):
+    async def test_create_organization_success(self, client: AsyncClient, test_core_db, submitted):
         """Test successful organization creation"""
         # Create and authenticate a user
         user = CoreUser(
@@ -36,6 +46,14 @@ class TestOrganizations:
         assert data["name"] == org_data["name"]
         assert data["slug"] == org_data["slug"]
         assert data["owner_id"] == user.id
+        assert data["provisioning_status"] == "provisioning"
+        assert submitted == ["test-org"]
+        
+        # Provisioning progress is reported by the status endpoint
+        response = await client.get("/api/organizations/test-org/status", headers=headers)
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "provisioning"
     
     @pytest.mark.asyncio
     async def test_create_organization_unauthenticated(self, client: AsyncClient):
@@ -77,4 +95,36 @@ class TestOrganizations:
         response = await client.post("/api/organizations/", json=org_data, headers=headers)
         
         assert response.status_code == 400
-        assert "Invalid slug format" in response.json()["detail"]
\ No newline at end of file
+        assert "Invalid slug format" in response.json()["detail"]
+    
+    @pytest.mark.asyncio
+    async def test_retry_failed_provisioning(self, client: AsyncClient, test_core_db, submitted):
+        """Test the owner can provision a failed organization again, once"""
+        user = CoreUser(
+            email="retry@example.com",
+            hashed_password=get_password_hash("password123"),
+            full_name="Organization Owner"
+        )
+        test_core_db.add(user)
+        await test_core_db.commit()
+        await test_core_db.refresh(user)
+        test_core_db.add(Organization(
+            name="Failed", slug="failed-org", owner_id=user.id,
+            provisioning_status="failed", provisioning_error="create_database: unreachable"
+        ))
+        await test_core_db.commit()
+        
+        access_token = create_access_token(data={"user_id": user.id, "context": "core"})
+        headers = {"Authorization": f"Bearer {access_token}"}
+        response = await client.post("/api/organizations/failed-org/retry", headers=headers)
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "provisioning"
+        assert response.json()["error"] is None
+        assert submitted == ["failed-org"]
+        
+        # It is provisioning now, so there is nothing to retry
+        response = await client.post("/api/organizations/failed-org/retry", headers=headers)
+        
+        assert response.status_code == 409
+        assert submitted == ["failed-org"]
\ No newline at end of file
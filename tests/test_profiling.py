@@ -0,0 +1,54 @@
+import pytest
+import pstats
+from httpx import AsyncClient
+from app.config import settings
+from app.core.profiling import _phases, record_phase, timed
+
+class TestProfilingMiddleware:
+
+    @pytest.mark.asyncio
+    async def test_server_timing_header(self, client: AsyncClient):
+        """Test responses report the serialize phase and total time"""
+        response = await client.get("/health")
+
+        timing = response.headers["server-timing"]
+        assert "serialize;dur=" in timing
+        assert "total;dur=" in timing
+
+    @pytest.mark.asyncio
+    async def test_slow_sampled_request_is_saved(self, client: AsyncClient, tmp_path, monkeypatch):
+        """Test a sampled request over the threshold is written as pstats"""
+        monkeypatch.setattr(settings, "profile_sample_rate", 1.0)
+        monkeypatch.setattr(settings, "profile_slow_request_seconds", 0.0)
+        monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+
+        await client.get("/health", headers={"X-TENANT": "acme"})
+
+        [saved] = tmp_path.glob("*.pstats")
+        assert "_GET_health_acme_" in saved.name
+        assert pstats.Stats(str(saved)).total_calls > 0
+
+    @pytest.mark.asyncio
+    async def test_fast_sampled_request_is_discarded(self, client: AsyncClient, tmp_path, monkeypatch):
+        """Test sampled requests under the threshold leave nothing on disk"""
+        monkeypatch.setattr(settings, "profile_sample_rate", 1.0)
+        monkeypatch.setattr(settings, "profile_slow_request_seconds", 60.0)
+        monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+
+        await client.get("/health")
+
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_timing_outside_a_request_is_ignored(self, client: AsyncClient):
+        """Test phases recorded with no request in flight are dropped"""
+        with timed("db"):
+            pass
+        record_phase("auth", 1.0)
+
+        assert _phases.get() is None
+        # Nothing recorded beforehand leaks into the next request's timings
+        response = await client.get("/health")
+        timing = response.headers["server-timing"]
+        assert "db;" not in timing
+        assert "auth;" not in timing
@@ -0,0 +1,90 @@
+import pytest
+import asyncio
+import time
+from datetime import timedelta
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.security import (
+    create_access_token,
+    get_password_hash_async,
+    get_password_hash_bulk_async,
+    verify_password_async,
+    verify_token,
+    password_hash_stats,
+    token_cache_stats,
+)
+
+class TestPasswordHashing:
+
+    @pytest.mark.asyncio
+    async def test_async_hash_round_trip(self):
+        """Test hashing and verifying in the worker pool"""
+        hashed = await get_password_hash_async("password123")
+
+        assert await verify_password_async("password123", hashed)
+        assert not await verify_password_async("wrongpassword", hashed)
+
+    @pytest.mark.asyncio
+    async def test_pool_drains_after_burst(self):
+        """Test in-flight counters return to zero once a burst completes"""
+        hashes = await asyncio.gather(
+            *(get_password_hash_async(f"password{i}") for i in range(6))
+        )
+
+        assert len(set(hashes)) == 6
+        stats = password_hash_stats()
+        assert stats["in_flight"] == 0
+        assert stats["queue_depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_bulk_hashing_leaves_workers_free(self, monkeypatch):
+        """Test bulk hashes never occupy more than their share of the pool"""
+        peak = 0
+
+        def slow_hash(password):
+            nonlocal peak
+            peak = max(peak, password_hash_stats()["running"])
+            time.sleep(0.01)
+            return password
+
+        monkeypatch.setattr("app.core.security.get_password_hash", slow_hash)
+        await asyncio.gather(*(get_password_hash_bulk_async(f"password{i}") for i in range(8)))
+
+        assert 1 <= peak <= settings.password_hash_bulk_workers
+
+class TestTokenCache:
+
+    def test_repeated_tokens_hit_the_cache(self):
+        """Test a token is decoded once and then served from the cache"""
+        token = create_access_token(data={"user_id": 42, "context": "core"})
+        hits_before = token_cache_stats()["hits"]
+
+        first = verify_token(token)
+        second = verify_token(token)
+
+        assert first.user_id == 42
+        assert second is first
+        assert token_cache_stats()["hits"] == hits_before + 1
+
+    def test_expired_tokens_are_not_served(self):
+        """Test cached entries stop at the token's own expiry"""
+        token = create_access_token(
+            data={"user_id": 7, "context": "core"},
+            expires_delta=timedelta(seconds=-1)
+        )
+
+        assert verify_token(token) is None
+        assert verify_token(token) is None
+
+    def test_ttl_cache_honours_deadlines(self):
+        """Test per-entry deadlines and the size bound"""
+        cache = TTLCache(max_size=2)
+        cache.set("expired", 1, expires_at=time.time() - 1)
+        assert cache.get("expired") is None
+
+        cache.set("a", 2)
+        cache.set("b", 3)
+        assert cache.get("a") == 2
+        cache.set("c", 4)
+        assert cache.get("b") is None
+        assert cache.stats()["evictions"] == 1
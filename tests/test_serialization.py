@@ -0,0 +1,40 @@
+import pytest
+import orjson
+from datetime import datetime, timezone
+from app.core.serialization import ORJSONResponse
+from app.models.tenant import TenantUser
+from app.schemas.auth import TenantUserPage, TenantUserResponse, tenant_user_json, tenant_user_page_json
+
+def make_user(user_id: int) -> TenantUser:
+    return TenantUser(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        hashed_password="x",
+        full_name="Tenant User",
+        bio=None,
+        phone="555-0100",
+        is_active=True,
+        created_at=datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+    )
+
+class TestJSONSerializer:
+
+    def test_matches_pydantic_output(self):
+        """Test the single-pass path produces the same JSON as the response schema"""
+        user = make_user(1)
+
+        fast = ORJSONResponse(user, tenant_user_json).body
+        expected = TenantUserResponse.model_validate(user).model_dump_json()
+
+        assert orjson.loads(fast) == orjson.loads(expected)
+
+    def test_nested_lists_are_converted(self):
+        """Test nested serializers convert every item of a list field"""
+        users = [make_user(1), make_user(2)]
+
+        fast = ORJSONResponse(tenant_user_page_json.build(items=users, next_cursor=2)).body
+        expected = TenantUserPage(
+            items=[TenantUserResponse.model_validate(user) for user in users], next_cursor=2
+        ).model_dump_json()
+
+        assert orjson.loads(fast) == orjson.loads(expected)
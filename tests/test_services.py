@@ -1,9 +1,19 @@
 import pytest
+import asyncio
+from datetime import timedelta
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.config import settings
+from app.database.core import Base
 from app.services.user_service import UserService
 from app.services.organization_service import OrganizationService
+from app.services.tenant_directory import TenantDirectory
+from app.services.provisioning import ProvisioningPipeline
+from app.services.fanout import fan_out, active_user_count
 from app.schemas.auth import UserRegister
 from app.schemas.organization import OrganizationCreate
-from app.models.core import CoreUser
+from app.models.core import CoreUser, Organization
+from app.models.tenant import TenantUser
 from app.core.security import get_password_hash
 
 class TestUserService:
@@ -23,6 +33,36 @@ class TestUserService:
         assert user.full_name == user_data.full_name
         assert user.id is not None
     
+    @pytest.mark.asyncio
+    async def test_duplicate_email_is_rejected(self, test_tenant_db):
+        """Test a conflicting insert is reported without touching the existing user"""
+        user_data = UserRegister(email="dup@example.com", password="password123", full_name="First")
+        first = await UserService.create_tenant_user(test_tenant_db, user_data)
+        
+        with pytest.raises(ValueError, match="Email already registered"):
+            await UserService.create_tenant_user(
+                test_tenant_db, user_data.model_copy(update={"full_name": "Second"})
+            )
+        
+        assert first.full_name == "First"
+        assert first.created_at is not None
+    
+    @pytest.mark.asyncio
+    async def test_email_registered_while_hashing_is_rejected(self, test_tenant_db, monkeypatch):
+        """Test the unique index still settles a registration racing the hash"""
+        async def racing_hash(password):
+            # Another request registers the same address meanwhile
+            await test_tenant_db.execute(
+                insert(TenantUser).values(email="race@example.com", hashed_password="x")
+            )
+            return "not-a-real-hash"
+        
+        monkeypatch.setattr("app.services.user_service.get_password_hash_async", racing_hash)
+        with pytest.raises(ValueError, match="Email already registered"):
+            await UserService.create_tenant_user(
+                test_tenant_db, UserRegister(email="race@example.com", password="password123")
+            )
+    
     @pytest.mark.asyncio
     async def test_authenticate_core_user(self, test_core_db):
         """Test authenticating a core user"""
@@ -64,4 +104,275 @@ class TestOrganizationService:
         assert not OrganizationService.validate_slug("test_org")  # Underscore
         assert not OrganizationService.validate_slug("-test")     # Starts with dash
         assert not OrganizationService.validate_slug("test-")     # Ends with dash
-        assert not OrganizationService.validate_slug("t")         # Too short
\ No newline at end of file
+        assert not OrganizationService.validate_slug("t")         # Too short
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_slug_is_rejected(self, test_core_db, monkeypatch):
+        """Test a taken slug is reported from the empty INSERT ... RETURNING result"""
+        monkeypatch.setattr(
+            "app.services.organization_service.provisioning_pipeline.submit", lambda slug, owner: None
+        )
+        owner = CoreUser(email="org-owner@example.com", hashed_password="x")
+        test_core_db.add(owner)
+        await test_core_db.commit()
+        org_data = OrganizationCreate(name="Acme", slug="acme")
+        
+        org = await OrganizationService.create_organization(test_core_db, org_data, owner)
+        assert org.provisioning_status == "provisioning"
+        
+        with pytest.raises(ValueError, match="Organization slug already exists"):
+            await OrganizationService.create_organization(test_core_db, org_data, owner)
+        # The owner loaded in this session is still usable
+        assert owner.email == "org-owner@example.com"
+
+class TestTenantDirectory:
+    
+    @pytest.fixture
+    async def directory(self, core_session_factory):
+        return TenantDirectory(core_session_factory)
+    
+    @pytest.mark.asyncio
+    async def test_active_and_inactive_tenants(self, directory, test_core_db):
+        """Test only active organizations are routable"""
+        owner = CoreUser(
+            email="dirowner@example.com",
+            hashed_password=get_password_hash("password123"),
+            full_name="Directory Owner"
+        )
+        test_core_db.add(owner)
+        await test_core_db.commit()
+        await test_core_db.refresh(owner)
+        
+        test_core_db.add_all([
+            Organization(name="Acme", slug="acme", owner_id=owner.id, provisioning_status="ready"),
+            Organization(name="Gone", slug="gone", owner_id=owner.id, is_active=False, provisioning_status="ready"),
+            Organization(name="New", slug="new", owner_id=owner.id),
+        ])
+        await test_core_db.commit()
+        
+        assert await directory.is_active("acme")
+        assert not await directory.is_active("gone")
+        assert not await directory.is_active("new")  # still provisioning
+    
+    @pytest.mark.asyncio
+    async def test_provisioning_tenant_is_looked_up_again(self, directory, test_core_db):
+        """Test a tenant seen while provisioning is routable as soon as it is ready"""
+        owner = CoreUser(email="ready@example.com", hashed_password="x")
+        test_core_db.add(owner)
+        await test_core_db.commit()
+        await directory.refresh()
+        organization = Organization(name="Soon", slug="soon", owner_id=owner.id)
+        test_core_db.add(organization)
+        await test_core_db.commit()
+        
+        assert not await directory.is_active("soon")
+        
+        # Finished by the pipeline of another worker
+        organization.provisioning_status = "ready"
+        await test_core_db.commit()
+        
+        assert await directory.is_active("soon")
+    
+    @pytest.mark.asyncio
+    async def test_unknown_slugs_are_negatively_cached(self, directory):
+        """Test unknown slugs are rejected from the negative cache on repeat"""
+        assert not await directory.is_active("no-such-org")
+        assert not await directory.is_active("no-such-org")
+        
+        assert directory.stats()["negative_hits"] == 1
+        
+        directory.register("no-such-org")
+        assert await directory.is_active("no-such-org")
+    
+    @pytest.mark.asyncio
+    async def test_refresh_rereads_rows_committed_late(self, directory, test_core_db, monkeypatch):
+        """Test a refresh catches rows stamped before its mark, and a full reload drops deleted ones"""
+        owner = CoreUser(email="late@example.com", hashed_password="x")
+        test_core_db.add(owner)
+        await test_core_db.commit()
+        test_core_db.add(Organization(name="Acme", slug="acme", owner_id=owner.id, provisioning_status="ready"))
+        await test_core_db.commit()
+        await directory.refresh()
+        
+        # Committed after the refresh, from a transaction that started before it
+        late = Organization(
+            name="Late", slug="late", owner_id=owner.id, provisioning_status="ready",
+            created_at=directory._high_water - timedelta(seconds=1)
+        )
+        test_core_db.add(late)
+        await test_core_db.commit()
+        directory._refreshed_at = 0
+        await directory.refresh()
+        
+        assert directory.active_slugs() == ["acme", "late"]
+        
+        await test_core_db.delete(late)
+        await test_core_db.commit()
+        monkeypatch.setattr(settings, "tenant_directory_full_reload_seconds", 0)
+        directory._refreshed_at = 0
+        await directory.refresh()
+        
+        assert directory.active_slugs() == ["acme"]
+    
+    @pytest.mark.asyncio
+    async def test_misses_are_looked_up_on_the_primary(self, core_session_factory, test_core_db):
+        """Test a tenant the lagging replica has not seen yet is not rejected"""
+        lagging = create_async_engine("sqlite+aiosqlite://")
+        async with lagging.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        replica_sessions = async_sessionmaker(lagging, class_=AsyncSession)
+        
+        async def replica():
+            return replica_sessions()
+        
+        owner = CoreUser(email="fresh@example.com", hashed_password="x")
+        test_core_db.add(owner)
+        await test_core_db.commit()
+        test_core_db.add(Organization(name="Fresh", slug="fresh", owner_id=owner.id, provisioning_status="ready"))
+        await test_core_db.commit()
+        
+        directory = TenantDirectory(replica, lookup_session_factory=core_session_factory)
+        
+        assert await directory.is_active("fresh")
+        await lagging.dispose()
+
+
+class TestProvisioningPipeline:
+    
+    @pytest.mark.asyncio
+    async def test_failed_steps_are_retried(self, core_session_factory, test_core_db):
+        """Test a step that fails once is retried and the tenant becomes ready"""
+        owner = CoreUser(
+            email="provowner@example.com",
+            hashed_password=get_password_hash("password123"),
+            full_name="Provisioning Owner"
+        )
+        test_core_db.add(owner)
+        await test_core_db.commit()
+        await test_core_db.refresh(owner)
+        test_core_db.add(Organization(name="Prov", slug="prov", owner_id=owner.id))
+        await test_core_db.commit()
+        
+        pipeline = ProvisioningPipeline(
+            core_session_factory, max_concurrency=2, max_attempts=3, retry_backoff=0
+        )
+        calls = []
+        
+        async def flaky_step(job):
+            calls.append(job.step)
+            if len(calls) == 1:
+                raise RuntimeError("database not reachable")
+        
+        async def ok_step(job):
+            calls.append(job.step)
+        
+        pipeline.steps = [("create_database", flaky_step), ("create_tables", ok_step)]
+        job = pipeline.submit("prov", owner)
+        await pipeline.wait("prov")
+        
+        assert job.status == "ready"
+        assert job.attempts == 3
+        assert calls == ["create_database", "create_database", "create_tables"]
+        
+        organization = await OrganizationService.get_organization(test_core_db, "prov")
+        await test_core_db.refresh(organization)
+        assert organization.provisioning_status == "ready"
+        assert organization.provisioning_error is None
+    
+    @pytest.mark.asyncio
+    async def test_restarted_pipeline_resumes_stuck_organizations(self, core_session_factory, test_core_db):
+        """Test organizations left in "provisioning" by a stopped process are provisioned on restart"""
+        owner = CoreUser(email="stuck@example.com", hashed_password="x")
+        test_core_db.add(owner)
+        await test_core_db.commit()
+        test_core_db.add_all([
+            Organization(name="Stuck", slug="stuck", owner_id=owner.id, provisioning_step="create_tables"),
+            Organization(name="Broken", slug="broken", owner_id=owner.id, provisioning_status="failed"),
+            Organization(name="Done", slug="done", owner_id=owner.id, provisioning_status="ready"),
+        ])
+        await test_core_db.commit()
+        
+        pipeline = ProvisioningPipeline(
+            core_session_factory, max_concurrency=2, max_attempts=1, retry_backoff=0
+        )
+        provisioned = []
+        
+        async def step(job):
+            provisioned.append((job.slug, job.owner.email))
+        
+        pipeline.steps = [("create_database", step)]
+        assert await pipeline.resume() == 1
+        await pipeline.wait("stuck")
+        
+        assert provisioned == [("stuck", "stuck@example.com")]
+        organization = await OrganizationService.get_organization(test_core_db, "stuck")
+        await test_core_db.refresh(organization)
+        assert organization.provisioning_status == "ready"
+
+    @pytest.mark.asyncio
+    async def test_finished_job_keeps_its_replacement(self, core_session_factory, test_core_db):
+        """Test a job finishing after a retry replaced it does not drop the new job"""
+        owner = CoreUser(email="replaced@example.com", hashed_password="x")
+        test_core_db.add(owner)
+        await test_core_db.commit()
+        test_core_db.add(Organization(name="Again", slug="again", owner_id=owner.id))
+        await test_core_db.commit()
+        
+        pipeline = ProvisioningPipeline(
+            core_session_factory, max_concurrency=2, max_attempts=1, retry_backoff=0
+        )
+        gates = {}
+        
+        async def step(job):
+            await gates[job].wait()
+        
+        pipeline.steps = [("create_database", step)]
+        first = pipeline.submit("again", owner)
+        second = pipeline.submit("again", owner)
+        gates.update({first: asyncio.Event(), second: asyncio.Event()})
+        
+        gates[first].set()
+        await first.task
+        assert pipeline.get_job("again") is second
+        
+        gates[second].set()
+        await second.task
+        assert pipeline.get_job("again") is None
+
+class TestFanOut:
+    
+    @pytest.mark.asyncio
+    async def test_partial_failures_are_reported(self, test_tenant_engine, test_tenant_db):
+        """Test fan-out streams per-tenant results, errors and timeouts"""
+        test_tenant_db.add(TenantUser(
+            email="fan@example.com", hashed_password="not-a-real-hash"
+        ))
+        await test_tenant_db.commit()
+        
+        sessions = async_sessionmaker(test_tenant_engine, class_=AsyncSession, expire_on_commit=False)
+        
+        async def session_factory(slug):
+            if slug == "broken":
+                raise ConnectionError("database unreachable")
+            return sessions(info={"tenant": slug})
+        
+        async def query(session):
+            if session.info["tenant"] == "slow":
+                await asyncio.sleep(1)
+            return await active_user_count(session)
+        
+        results = {
+            result.tenant: result
+            async for result in fan_out(
+                query,
+                tenants=["a", "b", "broken", "slow"],
+                concurrency=2,
+                timeout=0.2,
+                session_factory=session_factory
+            )
+        }
+        
+        assert results["a"].value == 1
+        assert results["b"].value == 1
+        assert "database unreachable" in results["broken"].error
+        assert "timed out" in results["slow"].error
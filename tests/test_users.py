@@ -1,7 +1,17 @@
 import pytest
 from httpx import AsyncClient
+from app.models.core import CoreUser, Organization
 from app.models.tenant import TenantUser
 from app.core.security import get_password_hash, create_access_token
+from app.core.cache import user_cache
+
+async def add_organization(test_core_db, owner_email: str):
+    """Create the "testorg" organization owned by the core user with ``owner_email``"""
+    owner = CoreUser(email=owner_email, hashed_password="not-a-real-hash")
+    test_core_db.add(owner)
+    await test_core_db.commit()
+    test_core_db.add(Organization(name="Test Org", slug="testorg", owner_id=owner.id))
+    await test_core_db.commit()
 
 class TestUsers:
     
@@ -99,4 +109,195 @@ class TestUsers:
         }
         response = await client.get("/api/users/me", headers=headers)
         
-        assert response.status_code == 403  # Forbidden
\ No newline at end of file
+        assert response.status_code == 403  # Forbidden
+
+    @pytest.mark.asyncio
+    async def test_profile_served_from_user_cache(self, client: AsyncClient, test_tenant_db):
+        """Test repeated profile reads hit the user cache and updates invalidate it"""
+        user = TenantUser(
+            email="cached@example.com",
+            hashed_password=get_password_hash("password123"),
+            full_name="Cached User"
+        )
+        test_tenant_db.add(user)
+        await test_tenant_db.commit()
+        await test_tenant_db.refresh(user)
+        
+        access_token = create_access_token(
+            data={"user_id": user.id, "context": "tenant", "tenant": "testorg"}
+        )
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "X-TENANT": "testorg"
+        }
+        
+        await client.get("/api/users/me", headers=headers)
+        hits_before = user_cache.hits
+        response = await client.get("/api/users/me", headers=headers)
+        
+        assert response.status_code == 200
+        assert user_cache.hits == hits_before + 1
+        
+        await client.put("/api/users/me", json={"full_name": "Renamed"}, headers=headers)
+        response = await client.get("/api/users/me", headers=headers)
+        
+        assert response.json()["full_name"] == "Renamed"
+    
+    @pytest.mark.asyncio
+    async def test_bulk_import_users(self, client: AsyncClient, test_core_db, test_tenant_db):
+        """Test bulk import reports duplicates and invalid rows per row"""
+        await add_organization(test_core_db, "admin@example.com")
+        admin = TenantUser(
+            email="admin@example.com",
+            hashed_password=get_password_hash("password123"),
+            full_name="Admin User"
+        )
+        test_tenant_db.add(admin)
+        await test_tenant_db.commit()
+        await test_tenant_db.refresh(admin)
+        
+        access_token = create_access_token(
+            data={"user_id": admin.id, "context": "tenant", "tenant": "testorg"}
+        )
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "X-TENANT": "testorg",
+            "Content-Type": "text/csv"
+        }
+        body = (
+            "email,password,full_name\n"
+            "one@example.com,password1,One\n"
+            "admin@example.com,password2,Already There\n"
+            "not-an-email,password3,Broken\n"
+            "two@example.com,password4,Two\n"
+            "one@example.com,password5,Repeated\n"
+        )
+        
+        response = await client.post("/api/users/import", content=body, headers=headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["duplicates"] == 2
+        assert data["invalid"] == 1
+        assert sorted(error["row"] for error in data["errors"]) == [2, 3, 5]
+    
+    @pytest.mark.asyncio
+    async def test_bulk_import_ndjson(self, client: AsyncClient, test_core_db, test_tenant_db):
+        """Test bulk import accepts newline-delimited JSON"""
+        await add_organization(test_core_db, "ndadmin@example.com")
+        admin = TenantUser(
+            email="ndadmin@example.com",
+            hashed_password=get_password_hash("password123"),
+            full_name="Admin User"
+        )
+        test_tenant_db.add(admin)
+        await test_tenant_db.commit()
+        await test_tenant_db.refresh(admin)
+        
+        access_token = create_access_token(
+            data={"user_id": admin.id, "context": "tenant", "tenant": "testorg"}
+        )
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "X-TENANT": "testorg",
+            "Content-Type": "application/x-ndjson"
+        }
+        body = (
+            '{"email": "nd1@example.com", "password": "password1", "phone": "555"}\n'
+            '{"email": "nd2@example.com", "password": "password2"}\n'
+        )
+        
+        response = await client.post("/api/users/import", content=body, headers=headers)
+        
+        assert response.status_code == 200
+        assert response.json()["imported"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_bulk_import_requires_owner(self, client: AsyncClient, test_core_db, test_tenant_db):
+        """Test members other than the organization owner cannot import users"""
+        await add_organization(test_core_db, "boss@example.com")
+        member = TenantUser(email="importer@example.com", hashed_password="not-a-real-hash")
+        test_tenant_db.add(member)
+        await test_tenant_db.commit()
+        await test_tenant_db.refresh(member)
+        
+        access_token = create_access_token(
+            data={"user_id": member.id, "context": "tenant", "tenant": "testorg"}
+        )
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "X-TENANT": "testorg",
+            "Content-Type": "text/csv"
+        }
+        body = "email,password\nsneaky@example.com,password1\n"
+        
+        response = await client.post("/api/users/import", content=body, headers=headers)
+        
+        assert response.status_code == 403
+    
+    @pytest.mark.asyncio
+    async def test_list_users_keyset_pagination(self, client: AsyncClient, test_core_db, test_tenant_db):
+        """Test listing users page by page with the returned cursor"""
+        await add_organization(test_core_db, "page0@example.com")
+        
+        users = [
+            TenantUser(
+                email=f"page{i}@example.com",
+                hashed_password="not-a-real-hash",
+                full_name=f"Page User {i}",
+                is_active=i != 3
+            )
+            for i in range(5)
+        ]
+        test_tenant_db.add_all(users)
+        await test_tenant_db.commit()
+        await test_tenant_db.refresh(users[0])
+        
+        access_token = create_access_token(
+            data={"user_id": users[0].id, "context": "tenant", "tenant": "testorg"}
+        )
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "X-TENANT": "testorg"
+        }
+        
+        response = await client.get("/api/users", params={"limit": 2}, headers=headers)
+        first_page = response.json()
+        response = await client.get(
+            "/api/users",
+            params={"limit": 2, "after_id": first_page["next_cursor"]},
+            headers=headers
+        )
+        second_page = response.json()
+        
+        assert [user["email"] for user in first_page["items"]] == ["page0@example.com", "page1@example.com"]
+        assert [user["email"] for user in second_page["items"]] == ["page2@example.com", "page3@example.com"]
+        
+        response = await client.get(
+            "/api/users", params={"is_active": "false"}, headers=headers
+        )
+        data = response.json()
+        assert [user["email"] for user in data["items"]] == ["page3@example.com"]
+        assert data["next_cursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_list_users_requires_owner(self, client: AsyncClient, test_core_db, test_tenant_db):
+        """Test members other than the organization owner cannot list every user"""
+        await add_organization(test_core_db, "boss@example.com")
+        member = TenantUser(email="member@example.com", hashed_password="not-a-real-hash")
+        test_tenant_db.add(member)
+        await test_tenant_db.commit()
+        await test_tenant_db.refresh(member)
+        
+        access_token = create_access_token(
+            data={"user_id": member.id, "context": "tenant", "tenant": "testorg"}
+        )
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "X-TENANT": "testorg"
+        }
+        
+        response = await client.get("/api/users", headers=headers)
+        
+        assert response.status_code == 403